@@ -9,11 +9,20 @@ COMPANIES_LINK = API_VERSION + 'companies'
 COMPANY_LINK = COMPANIES_LINK + '/{company_id}'
 PRODUCTS_LINK = COMPANY_LINK + '/products'
 PRODUCT_LINK = PRODUCTS_LINK + '/{product_id}'
+PRODUCTS_BULK_LINK = PRODUCTS_LINK + ':bulk'
+PRODUCTS_EXPORT_LINK = PRODUCTS_LINK + '/export'
+
+SEARCH_LINK = API_VERSION + 'search'
 
 REGISTER_LINK = API_VERSION + 'register'
 TOKEN_LINK = API_VERSION + 'token'
 REFRESH_LINK = API_VERSION + 'refresh'
 
+POOL_STATS_LINK = API_VERSION + 'stats/pool'
+CACHE_STATS_LINK = API_VERSION + 'stats/cache'
+# where Prometheus scrapes by default
+METRICS_LINK = '/metrics'
+
 POSTGRES_USER = os.getenv('POSTGRES_USER')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
 POSTGRES_HOST = os.getenv('POSTGRES_HOST')
@@ -24,6 +33,64 @@ database_url = (
     f'postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}'
     f'@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}'
 )
+async_database_url = (
+    f'postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}'
+    f'@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}'
+)
+
+# 'sync' runs blocking psycopg2 sessions in threadpool, 'async' uses asyncpg
+DATABASE_MODE = os.getenv('DATABASE_MODE', 'sync')
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+# seconds to wait for a free connection before failing the request
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+# seconds after which connection is replaced, -1 keeps connections forever
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'false').lower() == 'true'
+# milliseconds, 0 disables the limit
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 0))
+
+# schema belongs to migrations, 'true' creates missing tables on startup for throwaway databases
+DB_CREATE_SCHEMA = os.getenv('DB_CREATE_SCHEMA', 'false').lower() == 'true'
+
+# 'memory' keeps entries per worker process, 'redis' shares them, 'none' disables caching
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_TTL = float(os.getenv('CACHE_TTL', 60))
+CACHE_MAX_SIZE = int(os.getenv('CACHE_MAX_SIZE', 1024))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# rows per INSERT statement and rows accepted by one bulk request
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 500))
+BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 10000))
+# rows fetched from server-side cursor per round trip of export
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+# bodies below minimum size go out uncompressed, level is gzip's 1-9
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 500))
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+# brotli quality is 0-11, zstd level 1-22, low ones keep per-request compression cheap
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
+ZSTD_LEVEL = int(os.getenv('ZSTD_LEVEL', 3))
+# compressed bodies of responses carrying ETag, 0 disables the cache
+COMPRESSION_CACHE_SIZE = int(os.getenv('COMPRESSION_CACHE_SIZE', 256))
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 ALGORITHM = os.getenv('ALGORITHM')
+
+# trusting signed role claim skips user lookup on every authenticated request
+AUTH_STATELESS = os.getenv('AUTH_STATELESS', 'false').lower() == 'true'
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', 1024))
+
+ACCESS_TOKEN_TTL = float(os.getenv('ACCESS_TOKEN_TTL', 3600))
+REFRESH_TOKEN_TTL = float(os.getenv('REFRESH_TOKEN_TTL', 86400))
+# seconds between sweeps of expired refresh tokens, rows deleted per statement
+REFRESH_SWEEP_INTERVAL = float(os.getenv('REFRESH_SWEEP_INTERVAL', 300))
+REFRESH_SWEEP_BATCH = int(os.getenv('REFRESH_SWEEP_BATCH', 1000))
+
+# changing rounds upgrades stored hashes on next successful login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+# hashing requests allowed to wait for a worker before answering 429
+BCRYPT_QUEUE_SIZE = int(os.getenv('BCRYPT_QUEUE_SIZE', 16))
@@ -1,25 +1,274 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from functools import cache
+from typing import Any
+
+from sqlalchemy import Engine, Row, Select, create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 
-from app.config.core import database_url
+from app.config.core import (
+    DATABASE_MODE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT,
+    async_database_url,
+    database_url,
+)
+from app.services.metrics import DB_POOL_CHECKOUT_SECONDS, instrument_engine
 
 SQLALCHEMY_DATABASE_URL = database_url
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(
-    autoflush=False,
-    autocommit=False,
-    bind=engine
-)
+class CheckoutTimingMixin:
+    """Recording how long pool checkouts take.
+
+    Time covers both waiting for a connection to be returned
+    and opening a new one while the pool is below its limit.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._timing_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_CHECKOUT_SECONDS.observe(waited)
+            with self._timing_lock:
+                self.checkouts += 1
+                self.checkout_wait_total += waited
+                self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+
+class TimedQueuePool(CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+pool_options = {
+    'pool_size': DB_POOL_SIZE,
+    'max_overflow': DB_MAX_OVERFLOW,
+    'pool_timeout': DB_POOL_TIMEOUT,
+    'pool_recycle': DB_POOL_RECYCLE,
+    'pool_pre_ping': DB_POOL_PRE_PING,
+}
+
+connect_args = {}
+async_connect_args = {}
+if DB_STATEMENT_TIMEOUT:
+    connect_args['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
+    async_connect_args['server_settings'] = {'statement_timeout': str(DB_STATEMENT_TIMEOUT)}
+
+
+# engines are built on first use: importing the application loads no DBAPI driver
+@cache
+def get_engine() -> Engine:
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        poolclass=TimedQueuePool,
+        connect_args=connect_args,
+        **pool_options
+    )
+    return instrument_engine(engine)
+
+
+@cache
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+        bind=get_engine()
+    )
+
+
+@cache
+def get_async_engine() -> AsyncEngine:
+    engine = create_async_engine(
+        async_database_url,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        connect_args=async_connect_args,
+        **pool_options
+    )
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+@cache
+def get_async_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+        bind=get_async_engine()
+    )
+
+
+LAZY_ATTRIBUTES = {
+    'engine': get_engine,
+    'SessionLocal': get_session_factory,
+    'async_engine': get_async_engine,
+    'AsyncSessionLocal': get_async_session_factory,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Keeping `from app.config.database import engine` style imports working lazily."""
+
+    if name in LAZY_ATTRIBUTES:
+        return LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+class ThreadedSession:
+    """AsyncSession-like facade running blocking Session calls in threadpool.
+
+    Session is built on first use, so requests that never touch
+    the database neither create it nor check out a connection.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]) -> None:
+        self.session_factory = session_factory
+        self._sync_session: Session | None = None
+
+    @property
+    def sync_session(self) -> Session:
+        if self._sync_session is None:
+            self._sync_session = self.session_factory()
+        return self._sync_session
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: list[Any]) -> None:
+        self.sync_session.add_all(instances)
+
+    def get_bind(self, *args, **kwargs):
+        return self.sync_session.get_bind(*args, **kwargs)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance: Any, attribute_names=None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        if self._sync_session is not None:
+            await run_in_threadpool(self._sync_session.close)
+
+    async def run_sync(self, fn: Callable, *args, **kwargs) -> Any:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Snapshot of connection pool used by request sessions."""
+
+    pool = get_async_engine().pool if DATABASE_MODE == 'async' else get_engine().pool
+    checkouts = getattr(pool, 'checkouts', 0)
+    wait_total = getattr(pool, 'checkout_wait_total', 0.0)
+    return {
+        'mode': DATABASE_MODE,
+        'size': pool.size(),
+        'max_overflow': DB_MAX_OVERFLOW,
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+        'checkouts': checkouts,
+        'checkout_wait_total': wait_total,
+        'checkout_wait_avg': wait_total / checkouts if checkouts else 0.0,
+        'checkout_wait_max': getattr(pool, 'checkout_wait_max', 0.0),
+    }
+
+
+def as_async_session(db: Session | AsyncSession | ThreadedSession) -> AsyncSession | ThreadedSession:
+    """Giving one awaitable interface to sessions of both database modes."""
+
+    if isinstance(db, Session):
+        return ThreadedSession(lambda: db)
+    return db
+
+
+async def get_db() -> AsyncIterator[AsyncSession | ThreadedSession]:
+    """Request-scoped session, connection is checked out by its first statement."""
+
+    if DATABASE_MODE == 'async':
+        async with get_async_session_factory()() as db:
+            yield db
+        return
+
+    db = ThreadedSession(get_session_factory())
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+async def stream_partitions(statement: Select, size: int) -> AsyncIterator[list[Row]]:
+    """Rows of `statement` read from server-side cursor, `size` rows at a time.
+
+    Opens its own session: request-scoped one is already closed
+    by the time streaming response body is sent.
+    """
+
+    statement = statement.execution_options(yield_per=size)
+
+    if DATABASE_MODE == 'async':
+        async with get_async_session_factory()() as db:
+            result = await db.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+        return
+
+    db = get_session_factory()()
+    try:
+        partitions = (await run_in_threadpool(db.execute, statement)).partitions()
+        while partition := await run_in_threadpool(next, partitions, None):
+            yield partition
+    finally:
+        await run_in_threadpool(db.close)
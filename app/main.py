@@ -1,24 +1,46 @@
-from fastapi import Depends, FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-from app.config.database import Base, engine, get_db
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
-from .routers.auth import auth
+from app.config.core import DB_CREATE_SCHEMA
+from app.config.database import Base, get_engine
+from app.services.metrics import MetricsMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.responses import ORJSONResponse
+
+from .routers.auth import auth, sweep_refresh_tokens
 from .routers.company import company_router
+from .routers.monitoring import monitoring_router
 from .routers.product import product_router
-
-Base.metadata.create_all(bind=engine)
-
+from .routers.search import search_router
 
 description = '''
 # Companies and products management app
 This API documentation is made solely to fulfill the requirements to pass for the internship program to Reviro.io company.
 '''
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # migrations own the schema, opt-in creation runs here rather than at import
+    if DB_CREATE_SCHEMA:
+        await run_in_threadpool(Base.metadata.create_all, bind=get_engine())
+    sweeper = asyncio.create_task(sweep_refresh_tokens())
+    yield
+    sweeper.cancel()
+    # wait for sweep to roll back, shutdown would leave it pending mid-transaction
+    with suppress(asyncio.CancelledError):
+        await sweeper
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title='Reviro.io internship API',
     description=description,
     version='1.0.0',
-    dependencies=[Depends(get_db)],
+    default_response_class=ORJSONResponse,
     openapi_tags=[
         {
             'name': 'Companies',
@@ -28,10 +50,23 @@ app = FastAPI(
             'name': 'Products',
             'description': 'Operations for products'
         },
+        {
+            'name': 'Search',
+            'description': 'Full-text search over companies and products'
+        },
+        {
+            'name': 'Monitoring',
+            'description': 'Runtime statistics of the service'
+        },
     ]
 )
 
+app.add_middleware(CompressionMiddleware)
+# added last to wrap compression too, latency covers the whole response
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(company_router)
 app.include_router(product_router)
+app.include_router(search_router)
 app.include_router(auth)
+app.include_router(monitoring_router)
@@ -1,6 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, Time
-from sqlalchemy.dialects.postgresql import ENUM
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    Computed,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+    Time,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ENUM, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.config.database import Base
 
@@ -34,9 +44,27 @@ class Company(Base):
     social_media1 = Column(String)
     social_media2 = Column(String)
     social_media3 = Column(String)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False, server_default='1')
+    # maintained by Postgres, deferred so that regular loads don't carry it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
 
     products = relationship('Product', back_populates='company', cascade='all, delete')
 
+    __table_args__ = (
+        # keyset pagination by name, row comparison (name, id) > (...) is its range start
+        Index('ix_companies_name_id', 'name', 'id'),
+        Index('ix_companies_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
     def __str__(self):
         result = (
             f'"name": {self.name},\n'
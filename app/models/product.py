@@ -1,18 +1,30 @@
 from sqlalchemy import (
+    DDL,
     DECIMAL,
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    event,
     func,
+    text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.config.database import Base
 
 
+def trigram_available(ddl, target, bind, **kwargs) -> bool:
+    """pg_trgm ships with contrib, minimal Postgres builds may lack it."""
+
+    return bool(bind.scalar(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")))
+
+
 class Product(Base):
     __tablename__ = 'products'
 
@@ -25,5 +37,39 @@ class Product(Base):
     discount = Column(Integer, default=0)
     quantity = Column(Integer, default=0)
     company_id = Column(Integer, ForeignKey('companies.id', ondelete='CASCADE'))
+    version = Column(Integer, nullable=False, server_default='1')
+    # maintained by Postgres, deferred so that regular loads don't carry it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    ))
 
     company = relationship('Company', back_populates='products')
+
+    __table_args__ = (
+        # serves company filter alone and keyset pagination over (company_id, id)
+        Index('ix_products_company_id_id', 'company_id', 'id'),
+        # filtered and keyset-paginated product lists sorted by name or price
+        Index('ix_products_company_id_name_id', 'company_id', 'name', 'id'),
+        Index('ix_products_company_id_price_id', 'company_id', 'price', 'id'),
+        # substring search, ILIKE '%...%' can't use btree
+        Index(
+            'ix_products_name_trgm',
+            'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ).ddl_if(callable_=trigram_available),
+        Index('ix_products_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
+
+event.listen(
+    Product.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(callable_=trigram_available)
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
 
 from app.config.database import Base
 
@@ -16,5 +16,10 @@ class RefreshTokens(Base):
     __tablename__ = 'refresh_tokens'
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String)
-    expires_at = Column(DateTime)
+    # sha256 of issued token, the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    # tokens rotated from one login share family, reuse of any of them revokes it whole
+    family = Column(String(32), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    used_at = Column(DateTime(timezone=True))
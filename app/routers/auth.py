@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
@@ -5,24 +9,63 @@ from fastapi import Depends, HTTPException
 from fastapi.routing import APIRouter
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config.core import ALGORITHM, REGISTER_LINK, SECRET_KEY, TOKEN_LINK
+from app.config.core import (
+    ACCESS_TOKEN_TTL,
+    ALGORITHM,
+    AUTH_STATELESS,
+    CACHE_BACKEND,
+    REDIS_URL,
+    REFRESH_LINK,
+    REFRESH_SWEEP_BATCH,
+    REFRESH_SWEEP_INTERVAL,
+    REFRESH_TOKEN_TTL,
+    REGISTER_LINK,
+    SECRET_KEY,
+    TOKEN_LINK,
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL,
+)
 from app.config.database import get_db
-from app.models.user import RefreshTokens, User
-from app.schemas.auth import CreateUserRequest, Login, RegisterSuccess, Token
+from app.models.user import User
+from app.schemas.auth import (
+    CreateUserRequest,
+    Login,
+    RefreshRequest,
+    RegisterSuccess,
+    Token,
+    TokenClaims,
+)
+from app.services.cache import MemoryCache, NullCache, RedisCache
+from app.services.database.user import UserCRUD
+from app.services.security import hash_token, password_hasher
+
+logger = logging.getLogger(__name__)
 
 auth = APIRouter(
     tags=['Auth']
 )
 
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl='auth/token')
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[Session | AsyncSession, Depends(get_db)]
+
+# users are kept per process, entries live for USER_CACHE_TTL at most
+user_cache = MemoryCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL)
+# user id -> moment since which previously issued tokens are rejected
+revoked_users: dict[int, datetime] = {}
+# with redis backend revocations reach other workers too, entries outlive tokens issued before them
+shared_revocations = (
+    RedisCache.from_url(REDIS_URL, ttl=ACCESS_TOKEN_TTL, namespace='revoked:')
+    if CACHE_BACKEND == 'redis' else NullCache()
+)
+# refresh token family -> its expiry timestamp, revoked families are rejected before database lookup;
+# kept per worker, family rows are deleted too, so other workers reject it on lookup
+revoked_families: dict[str, int] = {}
 
 
 @auth.post(
@@ -30,17 +73,15 @@ db_dependency = Annotated[Session, Depends(get_db)]
     status_code=201,
     response_model=RegisterSuccess
 )
-def register(
+async def register(
     db: db_dependency,
     schema: CreateUserRequest
 ):
-    create_user = User(
+    hashed_password = await password_hasher.hash(schema.password)
+    create_user = await UserCRUD(db).create_user(
         username=schema.username,
-        hashed_password=bcrypt_context.hash(schema.password)
+        hashed_password=hashed_password
     )
-    db.add(create_user)
-    db.commit()
-    db.refresh(create_user)
     return {
         'message': 'New user created.',
         'id': create_user.id,
@@ -53,17 +94,39 @@ def register(
     TOKEN_LINK,
     response_model=Token
 )
-def obtain_token(
+async def obtain_token(
     db: db_dependency,
     login_form: Login,
 ):
     validate_data = login_form
-    user = authenticate_user(validate_data.username, validate_data.password, db)
+    user = await authenticate_user(validate_data.username, validate_data.password, db)
     if not user:
         raise HTTPException(status_code=401, detail='Could not validate user.')
 
-    access_token = create_token(user.username, user.id, user.role, timedelta(hours=1))
-    refresh_token = create_token(user.username, user.id, user.role, timedelta(days=1))
+    access_token = create_token(user.username, user.id, user.role, timedelta(seconds=ACCESS_TOKEN_TTL))
+    refresh_token = await store_refresh_token(db, user=user, family=secrets.token_hex(16))
+
+    return {
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'token_type': 'bearer'
+    }
+
+
+@auth.post(
+    REFRESH_LINK,
+    response_model=Token
+)
+async def refresh_token(
+    db: db_dependency,
+    schema: RefreshRequest
+):
+    claims = await validate_refresh_token(schema.refresh_token, db)
+    user = await load_user(claims, db)
+
+    access_token = create_token(user.username, user.id, user.role, timedelta(seconds=ACCESS_TOKEN_TTL))
+    # successor is committed together with its predecessor being marked as used
+    refresh_token = await store_refresh_token(db, user=user, family=claims.fam)
 
     return {
         'access_token': access_token,
@@ -72,74 +135,164 @@ def obtain_token(
     }
 
 
-def store_refresh_token(db: Session, token: str, expires_at: datetime):
-    refresh_token = RefreshTokens(token=token, expires_at=expires_at)
-    db.add(refresh_token)
-    db.commit()
+async def store_refresh_token(db: Session | AsyncSession, user: User, family: str) -> str:
+    """Issuing refresh token of rotation `family`, only its hash is stored."""
 
+    expires_delta = timedelta(seconds=REFRESH_TOKEN_TTL)
+    token = create_token(
+        user.username,
+        user.id,
+        user.role,
+        expires_delta,
+        typ='refresh',
+        fam=family,
+        jti=secrets.token_hex(8)
+    )
+    await UserCRUD(db).store_refresh_token(
+        token_hash=hash_token(token),
+        user_id=user.id,
+        family=family,
+        expires_at=datetime.now(timezone.utc) + expires_delta
+    )
+    return token
 
-def delete_expired_refresh_tokens(db: Session):
-    # Delete expired refresh tokens from the database
-    now = datetime.now(timezone.utc)
-    db.query(RefreshTokens).filter(RefreshTokens.expires_at < now).delete()
-    db.commit()
 
+async def validate_refresh_token(token: str, db: Session | AsyncSession) -> TokenClaims:
+    """Consuming refresh token, presenting already used one revokes its whole family."""
 
-def validate_refresh_token(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency):
     credentials_exception = HTTPException(
         status_code=401,
         detail='Could not validate credentials.'
     )
-    try:
-        db_token = db.query(RefreshTokens).filter(RefreshTokens.token == token).first()
-        if db_token:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username: str = payload.get('sub')
-            role: str = payload('role')
-            if username is None or role is None:
-                raise credentials_exception
-            user = db.query(User).filter(User.username == username).first()
-            return user
-        else:
-            raise credentials_exception
-    except (JWTError, ValidationError):
+    claims = decode_token(token, token_type='refresh')
+    if claims.fam is None or claims.fam in revoked_families:
         raise credentials_exception
 
+    consumed = await UserCRUD(db).consume_refresh_token(token_hash=hash_token(token))
+    if consumed is None:
+        # signature and expiry are fine, so token was rotated already: someone replays it
+        revoked_families[claims.fam] = claims.exp or int(time.time() + REFRESH_TOKEN_TTL)
+        await UserCRUD(db).delete_refresh_family(family=claims.fam)
+        raise credentials_exception
+    return claims
+
+
+async def delete_expired_refresh_tokens(db: Session | AsyncSession) -> int:
+    """Deleting expired tokens batch by batch, every batch is its own short transaction."""
 
-def authenticate_user(username: str, password: str, db):
-    user = db.query(User).filter(User.username == username).first()
+    crud = UserCRUD(db)
+    deleted = 0
+    while True:
+        batch = await crud.delete_expired_refresh_tokens(batch_size=REFRESH_SWEEP_BATCH)
+        deleted += batch
+        if batch < REFRESH_SWEEP_BATCH:
+            break
+        # letting requests through between batches
+        await asyncio.sleep(0)
+
+    now = time.time()
+    for family in [family for family, expires_at in revoked_families.items() if expires_at < now]:
+        del revoked_families[family]
+    return deleted
+
+
+async def sweep_refresh_tokens(interval: float = REFRESH_SWEEP_INTERVAL) -> None:
+    """Background loop running for the application lifetime."""
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async for db in get_db():
+                await delete_expired_refresh_tokens(db)
+        except Exception:
+            logger.exception('Sweeping expired refresh tokens failed.')
+
+
+async def authenticate_user(username: str, password: str, db):
+    user = await UserCRUD(db).get_user_by_username(username=username)
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.hashed_password):
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash is not None:
+        await UserCRUD(db).update_password_hash(user=user, hashed_password=new_hash)
     return user
 
 
-def create_token(username: str, user_id: int, role: str, expires_delta: timedelta):
-    encode = {'sub': username, 'id': user_id, 'role': role}
-    expires = datetime.now(timezone.utc) + expires_delta
-    encode.update({'exp': expires})
+def create_token(username: str, user_id: int, role: str, expires_delta: timedelta, **claims):
+    encode = {'sub': username, 'id': user_id, 'role': role, **claims}
+    issued = datetime.now(timezone.utc)
+    encode.update({'iat': issued, 'exp': issued + expires_delta})
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency):
+async def revoke_user_tokens(user_id: int) -> None:
+    """Rejecting every token issued to user until now, e.g. after role change."""
+
+    revoked_at = datetime.now(timezone.utc)
+    revoked_users[user_id] = revoked_at
+    await shared_revocations.set(f'user:{user_id}', revoked_at.timestamp())
+    await user_cache.delete(f'user:{user_id}')
+
+
+def decode_token(token: str, token_type: str = 'access') -> TokenClaims:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get('sub')
-        user_id: int = payload.get('id')
-        if username is None or user_id is None:
-            raise HTTPException(status_code=401, detail='Could not validate user.')
-        user = db.query(User).filter(User.username == username).first()
-        return user
-    except JWTError:
+        claims = TokenClaims.model_validate(payload)
+    except (JWTError, ValidationError):
+        raise HTTPException(status_code=401, detail='Could not validate user.')
+    # refresh token is no bearer credential and the other way round
+    if claims.typ != token_type:
+        raise HTTPException(status_code=401, detail='Could not validate user.')
+
+    revoked_at = revoked_users.get(claims.id)
+    if revoked_at is not None and (claims.iat is None or claims.iat <= revoked_at.timestamp()):
         raise HTTPException(status_code=401, detail='Could not validate user.')
+    return claims
+
+
+async def verify_token(token: str) -> TokenClaims:
+    """Claims of access token, revocations made by other workers are checked as well."""
+
+    claims = decode_token(token)
+    revoked_at = await shared_revocations.get(f'user:{claims.id}')
+    if revoked_at is not None and (claims.iat is None or claims.iat <= revoked_at):
+        raise HTTPException(status_code=401, detail='Could not validate user.')
+    return claims
+
+
+async def load_user(claims: TokenClaims, db) -> User:
+    key = f'user:{claims.id}'
+    user = await user_cache.get(key)
+    if user is None:
+        user = await UserCRUD(db).get_user(user_id=claims.id)
+        if user is None or user.username != claims.sub:
+            raise HTTPException(status_code=401, detail='Could not validate user.')
+        await user_cache.set(key, user)
+    return user
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency) -> User:
+    claims = await verify_token(token)
+    return await load_user(claims, db)
+
+
+async def get_token_claims(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency) -> TokenClaims:
+    """Claims of verified token, role is taken from database unless AUTH_STATELESS is set."""
+
+    claims = await verify_token(token)
+    if AUTH_STATELESS:
+        return claims
+    user = await load_user(claims, db)
+    return TokenClaims(sub=user.username, id=user.id, role=user.role, iat=claims.iat)
 
 
 class RoleChecker:
     def __init__(self, allowed_roles):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, user: Annotated[User, Depends(get_current_user)]):
+    def __call__(self, user: Annotated[TokenClaims, Depends(get_token_claims)]):
         if user.role in self.allowed_roles:
             return True
         raise HTTPException(
@@ -1,16 +1,47 @@
+from datetime import datetime
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config.core import COMPANIES_LINK, COMPANY_LINK
 from app.config.database import get_db
 from app.models.company import Company
 from app.routers.auth import RoleChecker, get_current_user
+from app.schemas.company import COMPANY_FIELDS, COMPANY_SUMMARY_FIELDS
 from app.schemas.company import Company as CompanySchema
-from app.schemas.company import CompanyCreate, CompanyPaginated, CompanyUpdate
+from app.schemas.company import (
+    CompanyCreate,
+    CompanyInclude,
+    CompanyPaginated,
+    CompanyPartial,
+    CompanyUpdate,
+)
+from app.schemas.pagination import SORT_KEYS, CountMode, PaginationMode, SortKey
+from app.schemas.product import PRODUCT_SUMMARY_FIELDS
 from app.services.api.company import CompanyService
+from app.services.api.product import ProductService
+from app.utils.conditional import (
+    entity_etag,
+    has_validators,
+    if_match_versions,
+    is_not_modified,
+    not_modified_response,
+    page_etag,
+    validator_headers,
+)
+from app.utils.fields import (
+    FIELDS_DESCRIPTION,
+    SUMMARY,
+    fields_query,
+    include_query,
+    parse_fields,
+    project,
+)
+from app.utils.pagination import decode_cursor, next_cursor
+from app.utils.responses import ORJSONResponse
 
 user_dependency = Annotated[dict, Depends(get_current_user)]
 
@@ -21,30 +52,77 @@ company_router = APIRouter()
 @company_router.get(
     COMPANIES_LINK,
     response_model=CompanyPaginated,
+    response_model_exclude_unset=True,
     tags=['Companies']
 )
-def get_companies(
+async def get_companies(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
-    db: Session = Depends(get_db)
-) -> dict[str, Any]:
-    count = CompanyService(db).get_total_count()
-    result = CompanyService(db).get_companies(
-        skip=skip,
-        limit=limit
+    pagination: PaginationMode = Query(PaginationMode.OFFSET),
+    order_by: SortKey = Query(SortKey.ID),
+    after: str | None = Query(None),
+    count: CountMode = Query(CountMode.EXACT),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: CompanyInclude | None = Query(None),
+    products_limit: int = Query(10, ge=1, le=100),
+    db: Session | AsyncSession = Depends(get_db)
+) -> ORJSONResponse | Response:
+    selected = parse_fields(fields, COMPANY_FIELDS, COMPANY_SUMMARY_FIELDS, default=SUMMARY)
+    extra_query = fields_query(fields) + include_query(include, products_limit)
+    cursor_mode = pagination == PaginationMode.CURSOR or bool(after)
+    sort_key, after_values = decode_cursor(after, SORT_KEYS) if after else (order_by.value, None)
+    # one extra row tells whether next page exists without relying on count
+    rows, total = await CompanyService(db).get_companies(
+        skip=0 if cursor_mode else skip,
+        limit=limit + 1,
+        order_by=sort_key,
+        after=after_values,
+        count=count,
+        fields=selected
     )
-    next_skip = skip + limit
-    prev_skip = skip - limit if skip >= limit else None
-    next_link = f'{COMPANIES_LINK[4:]}?skip={next_skip}&limit={limit}' if next_skip < count else None
-    prev_link = f'{COMPANIES_LINK[4:]}?skip={prev_skip}&limit={limit}' if prev_skip is not None else None
+    result, token = next_cursor(rows, limit, sort_key)
+    # products of the whole page come in one query, never one per company
+    products = {}
+    if include == CompanyInclude.PRODUCTS:
+        products = await ProductService(db).get_companies_products(
+            company_ids=[row.id for row in result],
+            limit=products_limit,
+            fields=PRODUCT_SUMMARY_FIELDS
+        )
+
+    if cursor_mode:
+        query = f'limit={limit}&count={count.value}{extra_query}'
+        next_link = f'{COMPANIES_LINK[4:]}?after={token}&{query}' if token else None
+        prev_link = None
+    else:
+        next_skip = skip + limit
+        prev_skip = skip - limit if skip >= limit else None
+        query = f'limit={limit}&order_by={sort_key}&count={count.value}{extra_query}'
+        next_link = f'{COMPANIES_LINK[4:]}?skip={next_skip}&{query}' if token else None
+        prev_link = f'{COMPANIES_LINK[4:]}?skip={prev_skip}&{query}' if prev_skip is not None else None
     # [4:] is necessary to go through the postman automatic addition when the link is generated
     # for production maybe it has to be changed
-    return {
-        'count': count,
-        'results': result,
+
+    # page validator is checked before results get serialized
+    nested = [product for company_products in products.values() for product in company_products]
+    etag = page_etag('companies', sorted(selected), extra_query, total, next_link, prev_link, rows=result + nested)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    results = [project(row, selected) for row in result]
+    if include == CompanyInclude.PRODUCTS:
+        for item, row in zip(results, result):
+            item['products'] = [project(product, PRODUCT_SUMMARY_FIELDS) for product in products[row.id]]
+
+    # rows hold plain column values already, response model would only validate them again
+    page = {
+        'count': total,
+        'results': results,
         'next_page': next_link,
         'prev_page': prev_link
     }
+    return ORJSONResponse(page, headers=validator_headers(etag))
 
 
 @company_router.post(
@@ -53,26 +131,60 @@ def get_companies(
     status_code=201,
     tags=['Companies']
 )
-def create_company(
+async def create_company(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
     schema: CompanyCreate,
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_db),
 ) -> Company:
-    result = CompanyService(db).create_company(schema=schema)
+    result = await CompanyService(db).create_company(schema=schema)
     return result
 
 
 @company_router.get(
     COMPANY_LINK,
-    response_model=CompanySchema,
+    response_model=CompanyPartial,
+    response_model_exclude_unset=True,
     tags=['Companies']
 )
-def get_company(
+async def get_company(
+    request: Request,
+    response: Response,
     company_id: int,
-    db: Session = Depends(get_db)
-) -> Company | HTTPException:
-    result = CompanyService(db).get_company(company_id=company_id)
-    return result
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    include: CompanyInclude | None = Query(None),
+    products_limit: int = Query(10, ge=1, le=100),
+    db: Session | AsyncSession = Depends(get_db)
+) -> dict[str, Any] | Response | HTTPException:
+    selected = parse_fields(fields, COMPANY_FIELDS, COMPANY_SUMMARY_FIELDS)
+    # answering revalidation from version alone, row itself isn't fetched
+    if has_validators(request) and include is None:
+        current = await CompanyService(db).get_company_version(company_id=company_id)
+        if current is not None:
+            version, updated_at = current
+            etag = entity_etag(version)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified_response(etag, updated_at)
+
+    result = await CompanyService(db).get_company(company_id=company_id)
+    updated_at = result['updated_at'] and datetime.fromisoformat(result['updated_at'])
+    etag = entity_etag(result['version'])
+    # whole row stays cached, projection is cut from it
+    body = project(result, selected)
+
+    if include == CompanyInclude.PRODUCTS:
+        products = (await ProductService(db).get_companies_products(
+            company_ids=[company_id],
+            limit=products_limit,
+            fields=PRODUCT_SUMMARY_FIELDS
+        ))[company_id]
+        # nested products change apart from company version, validator covers both
+        etag, updated_at = page_etag(etag, products_limit, rows=products), None
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        body['products'] = [project(product, PRODUCT_SUMMARY_FIELDS) for product in products]
+
+    response.headers.update(validator_headers(etag, updated_at))
+    return body
 
 
 @company_router.put(
@@ -80,16 +192,20 @@ def get_company(
     response_model=CompanySchema,
     tags=['Companies']
 )
-def put_company(
+async def put_company(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
+    response: Response,
     company_id: int,
     schema: CompanyUpdate,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> Company | HTTPException:
-    result = CompanyService(db).put_company(
+    result = await CompanyService(db).put_company(
         company_id=company_id,
-        schema=schema
+        schema=schema,
+        versions=if_match_versions(request)
     )
+    response.headers.update(validator_headers(entity_etag(result.version), result.updated_at))
     return result
 
 
@@ -98,16 +214,20 @@ def put_company(
     response_model=CompanySchema,
     tags=['Companies']
 )
-def patch_company(
+async def patch_company(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
+    response: Response,
     company_id: int,
     schema: CompanyUpdate,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> Company | HTTPException:
-    result = CompanyService(db).patch_company(
+    result = await CompanyService(db).patch_company(
         company_id=company_id,
-        schema=schema
+        schema=schema,
+        versions=if_match_versions(request)
     )
+    response.headers.update(validator_headers(entity_etag(result.version), result.updated_at))
     return result
 
 
@@ -116,10 +236,14 @@ def patch_company(
     response_model=CompanySchema,
     tags=['Companies']
 )
-def delete_company(
+async def delete_company(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
     company_id: int,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> JSONResponse | HTTPException:
-    result = CompanyService(db).delete_company(company_id=company_id)
+    result = await CompanyService(db).delete_company(
+        company_id=company_id,
+        versions=if_match_versions(request)
+    )
     return result
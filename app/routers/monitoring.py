@@ -0,0 +1,39 @@
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.config.core import CACHE_STATS_LINK, METRICS_LINK, POOL_STATS_LINK
+from app.config.database import get_pool_stats
+from app.schemas.monitoring import CacheStats, PoolStats
+from app.services.cache import cache
+from app.services.metrics import metrics_registry
+
+monitoring_router = APIRouter(
+    tags=['Monitoring']
+)
+
+
+@monitoring_router.get(
+    POOL_STATS_LINK,
+    response_model=PoolStats
+)
+async def pool_stats() -> dict[str, Any]:
+    return get_pool_stats()
+
+
+@monitoring_router.get(
+    CACHE_STATS_LINK,
+    response_model=CacheStats
+)
+async def cache_stats() -> dict[str, Any]:
+    return cache.stats()
+
+
+@monitoring_router.get(
+    METRICS_LINK,
+    response_class=PlainTextResponse
+)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -1,21 +1,61 @@
+from datetime import datetime
+from decimal import Decimal
 from typing import Annotated, Any
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config.core import PRODUCT_LINK, PRODUCTS_LINK
+from app.config.core import (
+    PRODUCT_LINK,
+    PRODUCTS_BULK_LINK,
+    PRODUCTS_EXPORT_LINK,
+    PRODUCTS_LINK,
+)
 from app.config.database import get_db
 from app.models.product import Product
 from app.routers.auth import RoleChecker
+from app.schemas.export import MEDIA_TYPES, ExportFormat
+from app.schemas.pagination import (
+    PRODUCT_SORT_KEYS,
+    CountMode,
+    PaginationMode,
+    ProductSortKey,
+)
+from app.schemas.product import PRODUCT_FIELDS, PRODUCT_SUMMARY_FIELDS
 from app.schemas.product import Product as ProductSchema
 from app.schemas.product import (
+    ProductBulkItem,
+    ProductBulkResult,
     ProductCreate,
+    ProductFilter,
     ProductPaginated,
+    ProductPartial,
     ProductPutUpdate,
     ProductUpdate,
 )
 from app.services.api.product import ProductService
+from app.utils.bulk import read_bulk_rows
+from app.utils.conditional import (
+    entity_etag,
+    has_validators,
+    if_match_versions,
+    is_not_modified,
+    not_modified_response,
+    page_etag,
+    validator_headers,
+)
+from app.utils.fields import (
+    FIELDS_DESCRIPTION,
+    SUMMARY,
+    fields_query,
+    parse_fields,
+    project,
+)
+from app.utils.pagination import decode_cursor, next_cursor
+from app.utils.responses import ORJSONResponse
 
 product_router = APIRouter()
 
@@ -23,32 +63,79 @@ product_router = APIRouter()
 @product_router.get(
     PRODUCTS_LINK,
     response_model=ProductPaginated,
+    response_model_exclude_unset=True,
     tags=['Products']
 )
-def get_products(
+async def get_products(
+    request: Request,
     company_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
-    db: Session = Depends(get_db)
-) -> dict[str, Any]:
-    count = ProductService(db).get_total_count(company_id=company_id)
-    result = ProductService(db).get_products(
+    pagination: PaginationMode = Query(PaginationMode.OFFSET),
+    order_by: ProductSortKey = Query(ProductSortKey.ID),
+    after: str | None = Query(None),
+    count: CountMode = Query(CountMode.EXACT),
+    name__icontains: str | None = Query(None, min_length=1),
+    price__gte: Decimal | None = Query(None, ge=0),
+    price__lte: Decimal | None = Query(None, ge=0),
+    discount__gt: int | None = Query(None, ge=0),
+    in_stock: bool | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session | AsyncSession = Depends(get_db)
+) -> ORJSONResponse | Response:
+    selected = parse_fields(fields, PRODUCT_FIELDS, PRODUCT_SUMMARY_FIELDS, default=SUMMARY)
+    filters = ProductFilter(
+        name__icontains=name__icontains,
+        price__gte=price__gte,
+        price__lte=price__lte,
+        discount__gt=discount__gt,
+        in_stock=in_stock
+    )
+    filter_params = filters.query_params()
+    filter_query = f'&{urlencode(filter_params)}' if filter_params else ''
+    filter_query += fields_query(fields)
+
+    cursor_mode = pagination == PaginationMode.CURSOR or bool(after)
+    sort_key, after_values = decode_cursor(after, PRODUCT_SORT_KEYS) if after else (order_by.value, None)
+    # one extra row tells whether next page exists without relying on count
+    rows, total = await ProductService(db).get_products(
         company_id=company_id,
-        skip=skip,
-        limit=limit
+        skip=0 if cursor_mode else skip,
+        limit=limit + 1,
+        order_by=sort_key,
+        after=after_values,
+        count=count,
+        filters=filters,
+        fields=selected
     )
-    next_skip = skip + limit
-    prev_skip = skip - limit if skip >= limit else None
-    next_link = f'/v1/companies/{company_id}/products?skip={next_skip}&limit={limit}' if next_skip < count else None
-    prev_link = f'/v1/companies/{company_id}/products?skip={prev_skip}&limit={limit}' if prev_skip is not None else None
+    result, token = next_cursor(rows, limit, sort_key)
+
+    if cursor_mode:
+        query = f'limit={limit}&count={count.value}{filter_query}'
+        next_link = f'/v1/companies/{company_id}/products?after={token}&{query}' if token else None
+        prev_link = None
+    else:
+        next_skip = skip + limit
+        prev_skip = skip - limit if skip >= limit else None
+        query = f'limit={limit}&order_by={sort_key}&count={count.value}{filter_query}'
+        next_link = f'/v1/companies/{company_id}/products?skip={next_skip}&{query}' if token else None
+        prev_link = f'/v1/companies/{company_id}/products?skip={prev_skip}&{query}' if prev_skip is not None else None
     # [4:] is necessary to go through the postman automatic addition when the link is generated
     # for production maybe it has to be changed
-    return {
-        'count': count,
-        'results': result,
+
+    # page validator is checked before results get serialized
+    etag = page_etag('products', company_id, sorted(selected), total, next_link, prev_link, rows=result)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    # rows hold plain column values already, response model would only validate them again
+    page = {
+        'count': total,
+        'results': [project(row, selected) for row in result],
         'next_page': next_link,
         'prev_page': prev_link
     }
+    return ORJSONResponse(page, headers=validator_headers(etag))
 
 
 @product_router.post(
@@ -57,34 +144,103 @@ def get_products(
     status_code=201,
     tags=['Products']
 )
-def create_product(
+async def create_product(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
     company_id: int,
     schema: ProductCreate,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> Product | HTTPException:
-    result = ProductService(db).create_product(
+    result = await ProductService(db).create_product(
         company_id=company_id,
         schema=schema
     )
     return result
 
 
+@product_router.post(
+    PRODUCTS_BULK_LINK,
+    response_model=ProductBulkResult,
+    tags=['Products'],
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {
+                    'schema': {'type': 'array', 'items': ProductBulkItem.model_json_schema()}
+                },
+                'application/x-ndjson': {
+                    'schema': {'type': 'string', 'description': 'One product object per line.'}
+                }
+            }
+        }
+    }
+)
+async def bulk_upsert_products(
+    _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
+    company_id: int,
+    db: Session | AsyncSession = Depends(get_db)
+) -> dict[str, Any] | HTTPException:
+    rows = await read_bulk_rows(request)
+    result = await ProductService(db).bulk_upsert_products(company_id=company_id, rows=rows)
+    return result
+
+
+# registered before PRODUCT_LINK, otherwise 'export' is taken for product id
+@product_router.get(
+    PRODUCTS_EXPORT_LINK,
+    response_class=StreamingResponse,
+    tags=['Products']
+)
+async def export_products(
+    company_id: int,
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias='format'),
+    db: Session | AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    chunks = await ProductService(db).export_products(company_id=company_id, export_format=export_format)
+    filename = f'company-{company_id}-products.{export_format.value}'
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
 @product_router.get(
     PRODUCT_LINK,
-    response_model=ProductSchema,
+    response_model=ProductPartial,
+    response_model_exclude_unset=True,
     tags=['Products']
 )
-def get_product(
+async def get_product(
+    request: Request,
+    response: Response,
     company_id: int,
     product_id: int,
-    db: Session = Depends(get_db)
-) -> Product | HTTPException:
-    result = ProductService(db).get_product(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session | AsyncSession = Depends(get_db)
+) -> dict[str, Any] | Response | HTTPException:
+    selected = parse_fields(fields, PRODUCT_FIELDS, PRODUCT_SUMMARY_FIELDS)
+    # answering revalidation from version alone, row itself isn't fetched
+    if has_validators(request):
+        current = await ProductService(db).get_product_version(
+            company_id=company_id,
+            product_id=product_id
+        )
+        if current is not None:
+            version, updated_at = current
+            etag = entity_etag(version)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified_response(etag, updated_at)
+
+    result = await ProductService(db).get_product(
         company_id=company_id,
         product_id=product_id
     )
-    return result
+    updated_at = result['updated_at'] and datetime.fromisoformat(result['updated_at'])
+    response.headers.update(validator_headers(entity_etag(result['version']), updated_at))
+    # whole row stays cached, projection is cut from it
+    return project(result, selected)
 
 
 @product_router.put(
@@ -92,18 +248,22 @@ def get_product(
     response_model=ProductSchema,
     tags=['Products']
 )
-def put_product(
+async def put_product(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
+    response: Response,
     company_id: int,
     product_id: int,
     schema: ProductPutUpdate,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> Product | HTTPException:
-    result = ProductService(db).put_product(
+    result = await ProductService(db).put_product(
         company_id=company_id,
         product_id=product_id,
-        schema=schema
+        schema=schema,
+        versions=if_match_versions(request)
     )
+    response.headers.update(validator_headers(entity_etag(result.version), result.updated_at))
     return result
 
 
@@ -112,18 +272,22 @@ def put_product(
     response_model=ProductSchema,
     tags=['Products']
 )
-def patch_product(
+async def patch_product(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
+    response: Response,
     company_id: int,
     product_id: int,
     schema: ProductUpdate,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> Product | HTTPException:
-    result = ProductService(db).put_product(
+    result = await ProductService(db).patch_product(
         company_id=company_id,
         product_id=product_id,
-        schema=schema
+        schema=schema,
+        versions=if_match_versions(request)
     )
+    response.headers.update(validator_headers(entity_etag(result.version), result.updated_at))
     return result
 
 
@@ -132,14 +296,16 @@ def patch_product(
     response_model=ProductSchema,
     tags=['Products']
 )
-def delete_product(
+async def delete_product(
     _: Annotated[bool, Depends(RoleChecker(allowed_roles=['user']))],
+    request: Request,
     company_id: int,
     product_id: int,
-    db: Session = Depends(get_db)
+    db: Session | AsyncSession = Depends(get_db)
 ) -> JSONResponse | HTTPException:
-    result = ProductService(db).delete_product(
+    result = await ProductService(db).delete_product(
         company_id=company_id,
-        product_id=product_id
+        product_id=product_id,
+        versions=if_match_versions(request)
     )
     return result
@@ -0,0 +1,50 @@
+from typing import Any
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.core import SEARCH_LINK
+from app.config.database import get_db
+from app.schemas.search import SEARCH_KINDS, SearchResults
+from app.services.api.search import SearchService
+from app.utils.pagination import decode_cursor, encode_cursor, invalid_cursor_exception
+
+search_router = APIRouter(
+    tags=['Search']
+)
+
+
+@search_router.get(
+    SEARCH_LINK,
+    response_model=SearchResults
+)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=100),
+    after: str | None = Query(None),
+    db: Session | AsyncSession = Depends(get_db)
+) -> dict[str, Any]:
+    after_key = None
+    if after:
+        # kind of the last hit travels in the slot other cursors use for sort key
+        kind, (rank, last_id) = decode_cursor(after, SEARCH_KINDS)
+        if not isinstance(rank, int | float):
+            return invalid_cursor_exception()
+        after_key = (float(rank), kind, last_id)
+
+    # one extra row tells whether next page exists
+    rows = await SearchService(db).search(q=q, limit=limit + 1, after=after_key)
+
+    next_link = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        token = encode_cursor(last.kind, [last.rank, last.id])
+        next_link = f'/v1/search?{urlencode({"q": q, "limit": limit, "after": token})}'
+
+    return {
+        'results': rows,
+        'next_page': next_link
+    }
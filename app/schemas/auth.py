@@ -23,3 +23,18 @@ class Token(BaseModel):
     access_token: str
     refresh_token: str
     token_type: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class TokenClaims(BaseModel):
+    sub: str
+    id: int
+    role: str
+    iat: int | None = None
+    exp: int | None = None
+    # tokens issued before refresh flow existed carry no type and are access ones
+    typ: str = 'access'
+    fam: str | None = None
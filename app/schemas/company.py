@@ -1,8 +1,10 @@
-from datetime import time
+from datetime import datetime, time
 from enum import Enum
 
 from pydantic import BaseModel
 
+from app.schemas.product import ProductPartial
+
 
 class Weekdays(str, Enum):
     ALL_WEEK_DAYS = 'all_week_days',
@@ -49,13 +51,33 @@ class CompanyUpdate(CompanyBase):
 
 class Company(CompanyBase):
     id: int
+    updated_at: datetime | None = None
+    version: int = 1
 
     class Config:
         from_attributes = True
 
 
+class CompanyInclude(str, Enum):
+    PRODUCTS = 'products'
+
+
+class CompanyPartial(CompanyUpdate):
+    """Sparse representation, only selected fields are set."""
+
+    id: int | None = None
+    updated_at: datetime | None = None
+    version: int | None = None
+    products: list[ProductPartial] | None = None
+
+
+COMPANY_FIELDS = tuple(Company.model_fields)
+# heavy free-form columns stay out of list views
+COMPANY_SUMMARY_FIELDS = ('name', 'schedule_start', 'schedule_end', 'schedule_weekdays', 'phone_number', 'id', 'version')
+
+
 class CompanyPaginated(BaseModel):
-    count: int
-    results: list[Company]
+    count: int | None
+    results: list[CompanyPartial]
     next_page: str | None = None
     prev_page: str | None = None
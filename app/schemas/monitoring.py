@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    mode: str
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    checkout_wait_total: float
+    checkout_wait_avg: float
+    checkout_wait_max: float
+
+
+class CacheStats(BaseModel):
+    backend: str
+    hits: int
+    misses: int
+    hit_ratio: float
+    size: int | None = None
@@ -0,0 +1,27 @@
+from enum import Enum
+
+
+class PaginationMode(str, Enum):
+    OFFSET = 'offset'
+    CURSOR = 'cursor'
+
+
+class CountMode(str, Enum):
+    EXACT = 'exact'
+    ESTIMATE = 'estimate'
+    NONE = 'none'
+
+
+class SortKey(str, Enum):
+    ID = 'id'
+    NAME = 'name'
+
+
+class ProductSortKey(str, Enum):
+    ID = 'id'
+    NAME = 'name'
+    PRICE = 'price'
+
+
+SORT_KEYS = {key.value for key in SortKey}
+PRODUCT_SORT_KEYS = {key.value for key in ProductSortKey}
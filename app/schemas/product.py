@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Annotated, Any
 
 from pydantic import BaseModel, Field
 
@@ -39,15 +40,70 @@ class ProductPutUpdate(ProductBase):
     company_id: int | None = None
 
 
+class ProductFilter(BaseModel):
+    name__icontains: str | None = None
+    price__gte: Decimal | None = None
+    price__lte: Decimal | None = None
+    discount__gt: int | None = None
+    in_stock: bool | None = None
+
+    def query_params(self) -> dict[str, Any]:
+        return self.model_dump(mode='json', exclude_none=True)
+
+
+# largest value of Postgres INTEGER column
+INTEGER_MAX = 2 ** 31 - 1
+
+
+class ProductBulkItem(ProductCreate):
+    """Row of bulk upsert, bounded by column types so that out of range row is reported on its own.
+
+    Value overflowing DECIMAL(10, 2) or INTEGER would fail the statement of the whole batch.
+    """
+
+    id: int | None = Field(default=None, ge=1, le=INTEGER_MAX)
+    price: Annotated[Decimal, Field(max_digits=10, decimal_places=2)] | None
+    quantity: int | None = Field(default=0, ge=0, le=INTEGER_MAX)
+    company_id: int | None = Field(default=None, ge=1, le=INTEGER_MAX)
+
+
+class ProductBulkRowResult(BaseModel):
+    index: int
+    status: str
+    id: int | None = None
+    errors: list[str] | None = None
+
+
+class ProductBulkResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: list[ProductBulkRowResult]
+
+
 class Product(ProductBase):
     id: int
+    version: int = 1
 
     class Config:
         from_attributes = True
 
 
+class ProductPartial(ProductUpdate):
+    """Sparse representation, only selected fields are set."""
+
+    id: int | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    version: int | None = None
+
+
+PRODUCT_FIELDS = tuple(Product.model_fields)
+PRODUCT_SUMMARY_FIELDS = ('name', 'price', 'discount', 'quantity', 'company_id', 'id', 'version')
+
+
 class ProductPaginated(BaseModel):
-    count: int
-    results: list[Product]
+    count: int | None
+    results: list[ProductPartial]
     next_page: str | None = None
     prev_page: str | None = None
@@ -0,0 +1,28 @@
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class SearchKind(str, Enum):
+    COMPANY = 'company'
+    PRODUCT = 'product'
+
+
+SEARCH_KINDS = {kind.value for kind in SearchKind}
+
+
+class SearchHit(BaseModel):
+    kind: SearchKind
+    id: int
+    company_id: int | None = None
+    name: str | None = None
+    description: str | None = None
+    rank: float
+
+    class Config:
+        from_attributes = True
+
+
+class SearchResults(BaseModel):
+    results: list[SearchHit]
+    next_page: str | None
@@ -0,0 +1,128 @@
+"""Production entry point running the application on several uvicorn workers.
+
+    python -m app.serve --workers 4
+
+Settings come from arguments or environment variables of the same meaning.
+Nothing from `app` is imported here: database pool limits derived for each
+worker have to be in environment before `app.config` reads it.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', 8000))
+# same default as app.config.core, 'memory' keeps cache and token revocations in each worker
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+# workers share state only through redis, one process is the default without it
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', (os.cpu_count() or 1) if CACHE_BACKEND == 'redis' else 1))
+WEB_LOOP = os.getenv('WEB_LOOP', 'uvloop')
+WEB_HTTP = os.getenv('WEB_HTTP', 'httptools')
+# seconds idle connection is kept open, keep it above idle timeout of load balancer in front
+WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', 5))
+WEB_BACKLOG = int(os.getenv('WEB_BACKLOG', 2048))
+# concurrent connections per worker before answering 503, 0 means no limit
+WEB_LIMIT_CONCURRENCY = int(os.getenv('WEB_LIMIT_CONCURRENCY', 0))
+# seconds in-flight requests get to finish after SIGTERM, keep it below container stop timeout
+WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 25))
+WEB_FORWARDED_ALLOW_IPS = os.getenv('WEB_FORWARDED_ALLOW_IPS', '127.0.0.1')
+WEB_ACCESS_LOG = os.getenv('WEB_ACCESS_LOG', 'true').lower() == 'true'
+
+# same defaults as app.config.core, read here before any worker imports it
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+# Postgres max_connections and connections kept free for migrations, psql and superuser
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', 100))
+DB_RESERVED_CONNECTIONS = int(os.getenv('DB_RESERVED_CONNECTIONS', 10))
+
+
+def worker_pool_limits(
+    workers: int,
+    max_connections: int,
+    reserved: int,
+    pool_size: int,
+    max_overflow: int
+) -> tuple[int, int]:
+    """Pool size and overflow of one worker, all workers together stay within max_connections."""
+
+    per_worker = (max_connections - reserved) // workers
+    if per_worker < 1:
+        raise ValueError(
+            f'{workers} workers need at least {workers + reserved} connections, '
+            f'Postgres allows {max_connections}.'
+        )
+    pool_size = min(pool_size, per_worker)
+    return pool_size, min(max_overflow, per_worker - pool_size)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m app.serve', description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=WEB_HOST)
+    parser.add_argument('--port', type=int, default=WEB_PORT)
+    parser.add_argument('--workers', type=int, default=WEB_WORKERS)
+    parser.add_argument('--loop', default=WEB_LOOP, choices=['auto', 'asyncio', 'uvloop'])
+    parser.add_argument('--http', default=WEB_HTTP, choices=['auto', 'h11', 'httptools'])
+    parser.add_argument('--keepalive', type=int, default=WEB_KEEPALIVE)
+    parser.add_argument('--backlog', type=int, default=WEB_BACKLOG)
+    parser.add_argument('--limit-concurrency', type=int, default=WEB_LIMIT_CONCURRENCY)
+    parser.add_argument('--graceful-timeout', type=int, default=WEB_GRACEFUL_TIMEOUT)
+    parser.add_argument('--forwarded-allow-ips', default=WEB_FORWARDED_ALLOW_IPS)
+    parser.add_argument('--no-access-log', dest='access_log', action='store_false', default=WEB_ACCESS_LOG)
+    parser.add_argument('--db-max-connections', type=int, default=DB_MAX_CONNECTIONS)
+    parser.add_argument('--db-reserved-connections', type=int, default=DB_RESERVED_CONNECTIONS)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.workers > 1 and CACHE_BACKEND != 'redis':
+        # other workers would keep serving cached entities and accepting revoked tokens
+        parser.error(f'{args.workers} workers need CACHE_BACKEND=redis, {CACHE_BACKEND!r} is kept per process')
+    return args
+
+
+def server_options(args: argparse.Namespace) -> dict:
+    return {
+        'host': args.host,
+        'port': args.port,
+        'workers': args.workers,
+        'loop': args.loop,
+        'http': args.http,
+        'timeout_keep_alive': args.keepalive,
+        'backlog': args.backlog,
+        'limit_concurrency': args.limit_concurrency or None,
+        # uvicorn stops accepting on SIGTERM and waits for in-flight requests this long
+        'timeout_graceful_shutdown': args.graceful_timeout,
+        'proxy_headers': True,
+        'forwarded_allow_ips': args.forwarded_allow_ips,
+        'access_log': args.access_log,
+        'server_header': False,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    pool_size, max_overflow = worker_pool_limits(
+        workers=args.workers,
+        max_connections=args.db_max_connections,
+        reserved=args.db_reserved_connections,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW
+    )
+    # workers are spawned processes, they read these when importing app.config
+    os.environ['DB_POOL_SIZE'] = str(pool_size)
+    os.environ['DB_MAX_OVERFLOW'] = str(max_overflow)
+    # workers write metric samples to shared directory, any of them serves the merged /metrics
+    metrics_dir = None
+    if args.workers > 1 and 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='prometheus-')
+    try:
+        uvicorn.run('app.main:app', **server_options(args))
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
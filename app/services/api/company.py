@@ -1,36 +1,83 @@
+from datetime import datetime
+from typing import Any
+
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 
 from app.models.company import Company
+from app.schemas.company import Company as CompanySchema
 from app.schemas.company import CompanyCreate, CompanyUpdate
+from app.schemas.pagination import CountMode
+from app.services.cache import cache, company_key
 from app.services.database.company import CompanyCRUD
 from app.services.root import AppService
 
 
 class CompanyService(AppService):
-    def get_companies(self, skip: int, limit: int) -> list[Company]:
-        result = CompanyCRUD(self.db).get_companies(skip=skip, limit=limit)
-        return result
+    async def get_companies(
+        self,
+        skip: int,
+        limit: int,
+        order_by: str = 'id',
+        after: list | None = None,
+        count: CountMode = CountMode.EXACT,
+        fields: tuple[str, ...] | None = None
+    ) -> tuple[list[Company], int | None]:
+        crud = CompanyCRUD(self.db)
+        result, total = await crud.get_companies(
+            skip=skip,
+            limit=limit,
+            order_by=order_by,
+            after=after,
+            with_count=count == CountMode.EXACT,
+            fields=fields
+        )
+        if count == CountMode.ESTIMATE:
+            total = await crud.estimate_total_count()
+        return result, total
 
-    def get_total_count(self) -> int:
-        return CompanyCRUD(self.db).get_total_count()
+    async def get_total_count(self) -> int:
+        return await CompanyCRUD(self.db).get_total_count()
 
-    def create_company(self, schema: CompanyCreate) -> Company:
-        result = CompanyCRUD(self.db).create_company(schema=schema)
+    async def create_company(self, schema: CompanyCreate) -> Company:
+        result = await CompanyCRUD(self.db).create_company(schema=schema)
         return result
 
-    def get_company(self, company_id: int) -> Company | HTTPException:
-        result = CompanyCRUD(self.db).get_company(company_id=company_id)
+    async def get_company(self, company_id: int) -> dict[str, Any] | HTTPException:
+        key = company_key(company_id)
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+
+        company = await CompanyCRUD(self.db).get_company(company_id=company_id)
+        result = CompanySchema.model_validate(company).model_dump(mode='json')
+        await cache.set(key, result)
         return result
 
-    def put_company(self, company_id: int, schema: CompanyUpdate) -> Company | HTTPException:
-        result = CompanyCRUD(self.db).put_company(company_id=company_id, schema=schema)
+    async def get_company_version(self, company_id: int) -> tuple[int, datetime | None] | None:
+        cached = await cache.get(company_key(company_id))
+        if cached is not None:
+            return cached['version'], cached['updated_at'] and datetime.fromisoformat(cached['updated_at'])
+        return await CompanyCRUD(self.db).get_company_version(company_id=company_id)
+
+    async def put_company(
+        self,
+        company_id: int,
+        schema: CompanyUpdate,
+        versions: list[int] | None = None
+    ) -> Company | HTTPException:
+        result = await CompanyCRUD(self.db).put_company(company_id=company_id, schema=schema, versions=versions)
         return result
 
-    def patch_company(self, company_id: int, schema: CompanyUpdate) -> Company | HTTPException:
-        result = CompanyCRUD(self.db).patch_company(company_id=company_id, schema=schema)
+    async def patch_company(
+        self,
+        company_id: int,
+        schema: CompanyUpdate,
+        versions: list[int] | None = None
+    ) -> Company | HTTPException:
+        result = await CompanyCRUD(self.db).patch_company(company_id=company_id, schema=schema, versions=versions)
         return result
 
-    def delete_company(self, company_id: int) -> JSONResponse | HTTPException:
-        CompanyCRUD(self.db).delete_company(company_id=company_id)
+    async def delete_company(self, company_id: int, versions: list[int] | None = None) -> JSONResponse | HTTPException:
+        await CompanyCRUD(self.db).delete_company(company_id=company_id, versions=versions)
         return JSONResponse(status_code=200, content='Company deleted.')
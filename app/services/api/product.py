@@ -1,45 +1,165 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 
+from app.config.core import EXPORT_BATCH_SIZE
+from app.config.database import stream_partitions
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductPutUpdate, ProductUpdate
-from app.services.database.product import ProductCRUD
+from app.schemas.export import ExportFormat
+from app.schemas.pagination import CountMode
+from app.schemas.product import Product as ProductSchema
+from app.schemas.product import (
+    ProductBulkItem,
+    ProductCreate,
+    ProductFilter,
+    ProductPutUpdate,
+    ProductUpdate,
+)
+from app.services.cache import cache, product_key
+from app.services.database.product import EXPORT_COLUMNS, ProductCRUD
 from app.services.root import AppService
+from app.utils.export import export_chunks
 
 
 class ProductService(AppService):
-    def get_products(self, company_id: int, skip: int, limit: int) -> list[Product]:
-        result = ProductCRUD(self.db).get_products(company_id=company_id, skip=skip, limit=limit)
+    async def get_products(
+        self,
+        company_id: int,
+        skip: int,
+        limit: int,
+        order_by: str = 'id',
+        after: list | None = None,
+        count: CountMode = CountMode.EXACT,
+        filters: ProductFilter | None = None,
+        fields: tuple[str, ...] | None = None
+    ) -> tuple[list[Product], int | None]:
+        crud = ProductCRUD(self.db)
+        result, total = await crud.get_products(
+            company_id=company_id,
+            skip=skip,
+            limit=limit,
+            order_by=order_by,
+            after=after,
+            with_count=count == CountMode.EXACT,
+            filters=filters,
+            fields=fields
+        )
+        if count == CountMode.ESTIMATE:
+            total = await crud.estimate_total_count(company_id=company_id, filters=filters)
+        return result, total
+
+    async def get_companies_products(
+        self,
+        company_ids: list[int],
+        limit: int,
+        fields: tuple[str, ...] | None = None
+    ) -> dict[int, list[Product]]:
+        result = await ProductCRUD(self.db).get_companies_products(
+            company_ids=company_ids,
+            limit=limit,
+            fields=fields
+        )
         return result
 
-    def get_total_count(self, company_id: int) -> int:
-        total = ProductCRUD(self.db).get_total_count(company_id=company_id)
+    async def get_total_count(self, company_id: int) -> int:
+        total = await ProductCRUD(self.db).get_total_count(company_id=company_id)
         return total
 
-    def create_product(self, company_id: int, schema: ProductCreate) -> Product | HTTPException:
-        result = ProductCRUD(self.db).create_product(company_id=company_id, schema=schema)
+    async def export_products(self, company_id: int, export_format: ExportFormat) -> AsyncIterator[str]:
+        # checked up front, once streaming starts status code can't change anymore
+        await ProductCRUD(self.db).check_company_id(company_id=company_id)
+        partitions = stream_partitions(ProductCRUD.export_statement(company_id), EXPORT_BATCH_SIZE)
+        return export_chunks(partitions, [column.key for column in EXPORT_COLUMNS], export_format)
+
+    async def create_product(self, company_id: int, schema: ProductCreate) -> Product | HTTPException:
+        result = await ProductCRUD(self.db).create_product(company_id=company_id, schema=schema)
         return result
 
-    def get_product(self, company_id: int, product_id: int) -> Product | HTTPException:
-        result = ProductCRUD(self.db).get_product(company_id=company_id, product_id=product_id)
+    async def bulk_upsert_products(self, company_id: int, rows: list[Any]) -> dict[str, Any] | HTTPException:
+        items, invalid, seen = [], [], set()
+        for index, row in enumerate(rows):
+            try:
+                if isinstance(row, Exception):
+                    raise ValueError(f'Invalid JSON: {row}')
+                item = ProductBulkItem.model_validate(row)
+            except ValidationError as error:
+                errors = [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()]
+                invalid.append({'index': index, 'status': 'invalid', 'errors': errors})
+                continue
+            except ValueError as error:
+                invalid.append({'index': index, 'status': 'invalid', 'errors': [str(error)]})
+                continue
+            if item.id is not None and item.id in seen:
+                invalid.append({'index': index, 'status': 'invalid', 'id': item.id, 'errors': ['Duplicate product id.']})
+                continue
+            seen.add(item.id)
+            items.append((index, item))
+
+        results = await ProductCRUD(self.db).bulk_upsert_products(company_id=company_id, items=items)
+        results = sorted(results + invalid, key=lambda row: row['index'])
+        return {
+            'created': sum(row['status'] == 'created' for row in results),
+            'updated': sum(row['status'] == 'updated' for row in results),
+            'failed': sum(row['status'] not in ('created', 'updated') for row in results),
+            'results': results
+        }
+
+    async def get_product(self, company_id: int, product_id: int) -> dict[str, Any] | HTTPException:
+        key = product_key(company_id, product_id)
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+
+        product = await ProductCRUD(self.db).get_product(company_id=company_id, product_id=product_id)
+        result = ProductSchema.model_validate(product).model_dump(mode='json')
+        await cache.set(key, result)
         return result
 
-    def put_product(self, company_id: int, product_id: int, schema: ProductPutUpdate) -> Product | HTTPException:
-        result = ProductCRUD(self.db).put_product(
+    async def get_product_version(self, company_id: int, product_id: int) -> tuple[int, datetime | None] | None:
+        cached = await cache.get(product_key(company_id, product_id))
+        if cached is not None:
+            return cached['version'], cached['updated_at'] and datetime.fromisoformat(cached['updated_at'])
+        return await ProductCRUD(self.db).get_product_version(company_id=company_id, product_id=product_id)
+
+    async def put_product(
+        self,
+        company_id: int,
+        product_id: int,
+        schema: ProductPutUpdate,
+        versions: list[int] | None = None
+    ) -> Product | HTTPException:
+        result = await ProductCRUD(self.db).put_product(
             company_id=company_id,
             product_id=product_id,
-            schema=schema
+            schema=schema,
+            versions=versions
         )
         return result
 
-    def patch_product(self, company_id: int, product_id: int, schema: ProductUpdate) -> Product | HTTPException:
-        result = ProductCRUD(self.db).patch_product(
+    async def patch_product(
+        self,
+        company_id: int,
+        product_id: int,
+        schema: ProductUpdate,
+        versions: list[int] | None = None
+    ) -> Product | HTTPException:
+        result = await ProductCRUD(self.db).patch_product(
             company_id=company_id,
             product_id=product_id,
-            schema=schema
+            schema=schema,
+            versions=versions
         )
         return result
 
-    def delete_product(self, company_id: int, product_id: int) -> JSONResponse | HTTPException:
-        ProductCRUD(self.db).delete_product(company_id=company_id, product_id=product_id)
+    async def delete_product(
+        self,
+        company_id: int,
+        product_id: int,
+        versions: list[int] | None = None
+    ) -> JSONResponse | HTTPException:
+        await ProductCRUD(self.db).delete_product(company_id=company_id, product_id=product_id, versions=versions)
         return JSONResponse(status_code=200, content='Product deleted.')
@@ -0,0 +1,8 @@
+from app.services.database.search import SearchCRUD
+from app.services.root import AppService
+
+
+class SearchService(AppService):
+    async def search(self, q: str, limit: int, after: tuple[float, str, int] | None = None) -> list:
+        result = await SearchCRUD(self.db).search(q=q, limit=limit, after=after)
+        return result
@@ -0,0 +1,190 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+from app.config.core import (
+    CACHE_BACKEND,
+    CACHE_MAX_SIZE,
+    CACHE_TTL,
+    COMPRESSION_CACHE_SIZE,
+    REDIS_URL,
+)
+
+
+def company_key(company_id: int) -> str:
+    return f'company:{company_id}'
+
+
+def product_key(company_id: int, product_id: int) -> str:
+    return f'{company_products_prefix(company_id)}{product_id}'
+
+
+def company_products_prefix(company_id: int) -> str:
+    return f'product:{company_id}:'
+
+
+class CacheBackend(ABC):
+    """Base for read-through cache of serialized API entities."""
+
+    name = 'base'
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any | None:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @abstractmethod
+    async def _get(self, key: str) -> Any | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def size(self) -> int | None:
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'size': self.size(),
+        }
+
+
+class NullCache(CacheBackend):
+    name = 'none'
+
+    async def _get(self, key: str) -> Any | None:
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        return None
+
+    async def delete(self, *keys: str) -> None:
+        return None
+
+    async def delete_prefix(self, prefix: str) -> None:
+        return None
+
+    async def clear(self) -> None:
+        return None
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry time to live."""
+
+    name = 'memory'
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def _get(self, key: str) -> Any | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            del self.entries[key]
+
+    async def clear(self) -> None:
+        self.entries.clear()
+
+    def size(self) -> int | None:
+        return len(self.entries)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared between workers through any Redis protocol server."""
+
+    name = 'redis'
+
+    def __init__(self, client, ttl: float, namespace: str = 'cache:') -> None:
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.namespace = namespace
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float, namespace: str = 'cache:') -> 'RedisCache':
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url), ttl=ttl, namespace=namespace)
+
+    async def _get(self, key: str) -> Any | None:
+        raw = await self.client.get(self.namespace + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(self.namespace + key, json.dumps(value), px=int(self.ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*[self.namespace + key for key in keys])
+
+    async def delete_prefix(self, prefix: str) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f'{self.namespace}{prefix}*')]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def clear(self) -> None:
+        await self.delete_prefix('')
+
+
+def build_cache(backend: str = CACHE_BACKEND) -> CacheBackend:
+    if backend == 'redis':
+        return RedisCache.from_url(REDIS_URL, ttl=CACHE_TTL)
+    if backend == 'memory':
+        return MemoryCache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL)
+    return NullCache()
+
+
+cache = build_cache()
+# compressed response bodies are bytes and cheap to rebuild, they stay in process
+compressed_cache = MemoryCache(max_size=COMPRESSION_CACHE_SIZE, ttl=CACHE_TTL) if COMPRESSION_CACHE_SIZE else NullCache()
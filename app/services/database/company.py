@@ -1,8 +1,17 @@
+from datetime import datetime
+from typing import Any
+
 from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.models.company import Company
 from app.schemas.company import CompanyCreate, CompanyUpdate
+from app.services.cache import cache, company_key, company_products_prefix
 from app.services.root import DatabaseCRUD
+from app.utils.conditional import precondition_failed_exception
+from app.utils.fields import load_fields
+from app.utils.pagination import keyset_order, keyset_phases
 
 
 def not_found_exception() -> HTTPException:
@@ -10,20 +19,52 @@ def not_found_exception() -> HTTPException:
 
 
 class CompanyCRUD(DatabaseCRUD):
-    def get_companies(self, skip: int, limit: int) -> list[Company]:
-        menus = (
-            self.db.query(Company)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    async def get_companies(
+        self,
+        skip: int,
+        limit: int,
+        order_by: str = 'id',
+        after: list | None = None,
+        with_count: bool = False,
+        fields: tuple[str, ...] | None = None
+    ) -> tuple[list[Company], int | None]:
+        sort_column = getattr(Company, order_by)
+        columns = [Company]
+        if with_count:
+            columns.append(select(func.count(Company.id)).scalar_subquery().label('total'))
+        query = (
+            select(*columns)
+            .order_by(*keyset_order(sort_column, Company.id))
         )
-        return menus
-
-    def get_total_count(self) -> int:
-        total = self.db.query(Company).count()
+        if fields is not None:
+            # version feeds page validator, sort key feeds the cursor
+            query = query.options(load_fields(Company, fields, 'version', order_by))
+
+        if after is not None:
+            menus = await self.keyset_page(query, keyset_phases(sort_column, Company.id, after), limit)
+        else:
+            menus = (await self.db.execute(query.offset(skip).limit(limit))).all()
+
+        if not with_count:
+            return [row.Company for row in menus], None
+        if menus:
+            return [row.Company for row in menus], menus[0].total
+        # page past the end carries no total, first empty page means no rows at all
+        if skip == 0 and after is None:
+            return [], 0
+        return [], await self.get_total_count()
+
+    async def get_total_count(self) -> int:
+        total = await self.db.scalar(select(func.count(Company.id)))
         return total
 
-    def create_company(self, schema: CompanyCreate) -> Company:
+    async def estimate_total_count(self) -> int:
+        estimate = await self.table_row_estimate(Company.__tablename__)
+        if estimate is None:
+            return await self.get_total_count()
+        return estimate
+
+    async def create_company(self, schema: CompanyCreate) -> Company:
 
         new_company = Company(
             name=schema.name,
@@ -40,16 +81,17 @@ class CompanyCRUD(DatabaseCRUD):
         )
 
         self.db.add(new_company)
-        self.db.commit()
-        self.db.refresh(new_company)
+        # refreshing before commit keeps the whole write on one connection checkout
+        await self.db.flush()
+        await self.db.refresh(new_company)
+        await self.db.commit()
 
         return new_company
 
-    def get_company(self, company_id: int) -> Company | HTTPException:
-        company = (
-            self.db.query(Company)
-            .filter(Company.id == company_id)
-            .first()
+    async def get_company(self, company_id: int) -> Company | HTTPException:
+        company = await self.db.scalar(
+            select(Company)
+            .where(Company.id == company_id)
         )
 
         if not company:
@@ -57,44 +99,73 @@ class CompanyCRUD(DatabaseCRUD):
 
         return company
 
-    def put_company(self, company_id: int, schema: CompanyUpdate) -> Company | HTTPException:
-        company = self.db.query(Company).filter(Company.id == company_id).first()
+    async def get_company_version(self, company_id: int) -> tuple[int, datetime | None] | None:
+        row = (await self.db.execute(
+            select(Company.version, Company.updated_at)
+            .where(Company.id == company_id)
+        )).first()
 
-        if not company:
-            return not_found_exception()
+        if row is None:
+            return None
+        return row.version, row.updated_at
 
-        for key, value in schema.model_dump(exclude_unset=True).items():
-            setattr(company, key, value)
+    async def update_company(
+        self,
+        company_id: int,
+        values: dict[str, Any],
+        versions: list[int] | None = None
+    ) -> Company | HTTPException:
+        criteria = [Company.id == company_id]
+        if versions is not None:
+            criteria.append(Company.version.in_(versions))
 
-        self.db.commit()
-        self.db.refresh(company)
-
-        return company
-
-    def patch_company(self, company_id: int, schema: CompanyUpdate) -> Company | HTTPException:
-        company = self.db.query(Company).filter(Company.id == company_id).first()
+        company = await self.update_returning(Company, values, *criteria)
 
         if not company:
+            if versions is not None and await self.get_company_version(company_id=company_id):
+                return precondition_failed_exception()
             return not_found_exception()
 
-        patch_data = schema.model_dump(exclude_unset=True)
+        await self.db.commit()
+        await cache.delete(company_key(company_id))
 
-        for key, value in patch_data.items():
-            setattr(company, key, value)
+        return company
 
-        self.db.commit()
-        self.db.refresh(company)
+    async def put_company(
+        self,
+        company_id: int,
+        schema: CompanyUpdate,
+        versions: list[int] | None = None
+    ) -> Company | HTTPException:
+        company = await self.update_company(company_id, schema.model_dump(exclude_unset=True), versions)
+        return company
 
+    async def patch_company(
+        self,
+        company_id: int,
+        schema: CompanyUpdate,
+        versions: list[int] | None = None
+    ) -> Company | HTTPException:
+        company = await self.update_company(company_id, schema.model_dump(exclude_unset=True), versions)
         return company
 
-    def delete_company(self, company_id: int) -> None | HTTPException:
+    async def delete_company(self, company_id: int, versions: list[int] | None = None) -> None | HTTPException:
 
-        company = self.db.query(Company).filter(Company.id == company_id).first()
+        company = await self.db.scalar(select(Company).where(Company.id == company_id))
 
         if not company:
             return not_found_exception()
-
-        self.db.delete(company)
-        self.db.commit()
+        if versions is not None and company.version not in versions:
+            return precondition_failed_exception()
+
+        await self.db.delete(company)
+        try:
+            await self.db.commit()
+        except StaleDataError:
+            # DELETE is guarded by loaded version, row changed after it was read
+            await self.db.rollback()
+            return precondition_failed_exception()
+        await cache.delete(company_key(company_id))
+        await cache.delete_prefix(company_products_prefix(company_id))
 
         return None
@@ -1,10 +1,59 @@
-from fastapi import HTTPException
+from datetime import datetime
+from typing import Any
 
+from fastapi import HTTPException
+from sqlalchemy import (
+    Integer,
+    Select,
+    and_,
+    cast,
+    column,
+    func,
+    insert,
+    or_,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.config.core import BULK_BATCH_SIZE
 from app.models.company import Company
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductPutUpdate, ProductUpdate
+from app.schemas.product import (
+    ProductBulkItem,
+    ProductCreate,
+    ProductFilter,
+    ProductPutUpdate,
+    ProductUpdate,
+)
+from app.services.cache import cache, product_key
 from app.services.database.company import not_found_exception as no_company
 from app.services.root import DatabaseCRUD
+from app.utils.conditional import precondition_failed_exception
+from app.utils.fields import load_fields
+from app.utils.pagination import keyset_order, keyset_phases
+
+EXPORT_COLUMNS = [
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.created_at,
+    Product.updated_at,
+    Product.price,
+    Product.discount,
+    Product.quantity,
+    Product.company_id,
+]
+BULK_COLUMNS = [
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.discount,
+    Product.quantity,
+]
 
 
 def not_found_exception() -> HTTPException:
@@ -15,34 +64,161 @@ def not_found_exception() -> HTTPException:
 
 class ProductCRUD(DatabaseCRUD):
 
-    def check_company_id(self, company_id: int) -> HTTPException | None:
-        result = self.db.query(Company).filter(Company.id == company_id).first()
+    async def check_company_id(self, company_id: int) -> HTTPException | None:
+        result = await self.db.scalar(select(Company.id).where(Company.id == company_id))
 
         if not result:
             return no_company()
         return None
 
-    def get_products(self, company_id: int, skip: int, limit: int) -> list[Product] | HTTPException:
+    async def get_company_product(self, company_id: int, product_id: int) -> Product | HTTPException:
+        """Product looked up together with its company, so one statement tells which one is missing."""
 
-        self.check_company_id(company_id=company_id)
+        row = (await self.db.execute(
+            select(Company.id, Product)
+            .outerjoin(Product, and_(Product.company_id == Company.id, Product.id == product_id))
+            .where(Company.id == company_id)
+        )).first()
 
-        products = (
-            self.db.query(Product)
-            .filter(Product.company_id == company_id)
-            .offset(skip)
+        if row is None:
+            return no_company()
+        if row.Product is None:
+            return not_found_exception()
+        return row.Product
+
+    @staticmethod
+    def list_criteria(company_id: int, filters: ProductFilter | None = None) -> list:
+        """WHERE clause of product list, every predicate leads with indexed company_id."""
+
+        criteria = [Product.company_id == company_id]
+        if filters is None:
+            return criteria
+
+        if filters.name__icontains:
+            criteria.append(Product.name.icontains(filters.name__icontains, autoescape=True))
+        if filters.price__gte is not None:
+            criteria.append(Product.price >= filters.price__gte)
+        if filters.price__lte is not None:
+            criteria.append(Product.price <= filters.price__lte)
+        if filters.discount__gt is not None:
+            criteria.append(Product.discount > filters.discount__gt)
+        if filters.in_stock is True:
+            criteria.append(Product.quantity > 0)
+        elif filters.in_stock is False:
+            criteria.append(or_(Product.quantity <= 0, Product.quantity.is_(None)))
+        return criteria
+
+    async def get_products(
+        self,
+        company_id: int,
+        skip: int,
+        limit: int,
+        order_by: str = 'id',
+        after: list | None = None,
+        with_count: bool = False,
+        filters: ProductFilter | None = None,
+        fields: tuple[str, ...] | None = None
+    ) -> tuple[list[Product], int | None] | HTTPException:
+
+        criteria = self.list_criteria(company_id, filters)
+        sort_column = getattr(Product, order_by)
+        columns = [Product]
+        if with_count:
+            columns.append(
+                select(func.count(Product.id))
+                .where(*criteria)
+                .scalar_subquery()
+                .label('total')
+            )
+        query = (
+            select(*columns)
+            .where(*criteria)
+            .order_by(*keyset_order(sort_column, Product.id))
+        )
+        if fields is not None:
+            # version feeds page validator, sort key feeds the cursor
+            query = query.options(load_fields(Product, fields, 'version', order_by))
+
+        if after is not None:
+            products = await self.keyset_page(query, keyset_phases(sort_column, Product.id, after), limit)
+        else:
+            products = (await self.db.execute(query.offset(skip).limit(limit))).all()
+
+        # products imply their company exists, only empty page needs to check it
+        if not products:
+            await self.check_company_id(company_id=company_id)
+
+        if not with_count:
+            return [row.Product for row in products], None
+        if products:
+            return [row.Product for row in products], products[0].total
+        # page past the end carries no total, first empty page means no rows at all
+        if skip == 0 and after is None:
+            return [], 0
+        return [], await self.get_total_count(company_id=company_id, filters=filters)
+
+    async def get_companies_products(
+        self,
+        company_ids: list[int],
+        limit: int,
+        fields: tuple[str, ...] | None = None
+    ) -> dict[int, list[Product]]:
+        """First `limit` products of every company in one query.
+
+        LATERAL subquery walks ix_products_company_id_id once per company,
+        so the cost follows page size rather than catalog size.
+        """
+
+        if not company_ids:
+            return {}
+        top = (
+            select(Product)
+            .where(Product.company_id == Company.id)
+            .order_by(Product.id)
             .limit(limit)
-            .all()
+            .lateral()
         )
+        product = aliased(Product, top)
+        query = (
+            select(product)
+            .select_from(Company)
+            .join(top, true())
+            .where(Company.id.in_(company_ids))
+            .order_by(product.company_id, product.id)
+        )
+        if fields is not None:
+            query = query.options(load_fields(product, fields, 'version', 'company_id'))
+
+        result = {company_id: [] for company_id in company_ids}
+        for row in (await self.db.scalars(query)).all():
+            result[row.company_id].append(row)
+        return result
+
+    async def get_total_count(self, company_id: int, filters: ProductFilter | None = None) -> int:
+        total = await self.db.scalar(
+            select(func.count(Product.id))
+            .where(*self.list_criteria(company_id, filters))
+        )
+        return total
 
-        return products
+    async def estimate_total_count(self, company_id: int, filters: ProductFilter | None = None) -> int:
+        if await self.table_row_estimate(Product.__tablename__) is None:
+            return await self.get_total_count(company_id=company_id, filters=filters)
+        return await self.plan_row_estimate(
+            select(Product.id).where(*self.list_criteria(company_id, filters))
+        )
 
-    def get_total_count(self, company_id: int) -> int:
-        total = self.db.query(Product).filter(Product.company_id == company_id).count()
-        return total
+    @staticmethod
+    def export_statement(company_id: int) -> Select:
+        return (
+            select(*EXPORT_COLUMNS)
+            .where(Product.company_id == company_id)
+            .order_by(Product.id)
+        )
 
-    def create_product(self, company_id: int, schema: ProductCreate) -> Product:
+    async def create_product(self, company_id: int, schema: ProductCreate) -> Product:
 
-        self.check_company_id(company_id=company_id)
+        await self.check_company_id(company_id=company_id)
 
         new_product = Product(
             name=schema.name,
@@ -56,82 +232,161 @@ class ProductCRUD(DatabaseCRUD):
         )
 
         self.db.add(new_product)
-        self.db.commit()
-        self.db.refresh(new_product)
+        await self.db.flush()
+        await self.db.refresh(new_product)
+        await self.db.commit()
 
         return new_product
 
-    def get_product(self, company_id: int, product_id: int) -> Product | HTTPException:
-
-        self.check_company_id(company_id=company_id)
-
-        product = (
-            self.db.query(Product)
-            .filter(Product.company_id == company_id, Product.id == product_id)
-            .first()
+    async def bulk_upsert_products(
+        self,
+        company_id: int,
+        items: list[tuple[int, ProductBulkItem]]
+    ) -> list[dict] | HTTPException:
+        """Inserting rows without `id` and updating rows with `id`, in batches of one transaction."""
+
+        await self.check_company_id(company_id=company_id)
+
+        results = []
+        for start in range(0, len(items), BULK_BATCH_SIZE):
+            batch = items[start:start + BULK_BATCH_SIZE]
+            results += await self._insert_batch(company_id, [row for row in batch if row[1].id is None])
+            results += await self._update_batch(company_id, [row for row in batch if row[1].id is not None])
+
+        await self.db.commit()
+        for row in results:
+            if row['status'] == 'updated':
+                await cache.delete(product_key(company_id, row['id']))
+
+        return results
+
+    @staticmethod
+    def bulk_values(company_id: int, item: ProductBulkItem) -> dict:
+        row = item.model_dump(include={bulk_column.key for bulk_column in BULK_COLUMNS})
+        row['company_id'] = company_id
+        return row
+
+    async def _insert_batch(self, company_id: int, rows: list[tuple[int, ProductBulkItem]]) -> list[dict]:
+        if not rows:
+            return []
+        # executemany with RETURNING is sent as multi-row VALUES, ids come back in parameter order
+        ids = await self.db.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [self.bulk_values(company_id, item) for _, item in rows]
         )
-
-        if not product:
-            return not_found_exception()
-
+        return [
+            {'index': index, 'status': 'created', 'id': product_id}
+            for (index, _), product_id in zip(rows, ids.all())
+        ]
+
+    async def _update_batch(self, company_id: int, rows: list[tuple[int, ProductBulkItem]]) -> list[dict]:
+        if not rows:
+            return []
+        # ids are never inserted as given, that would run ahead of the id sequence,
+        # so statuses come from rows the UPDATE itself matched
+        data = values(
+            column('id', Integer),
+            *[column(bulk_column.key, bulk_column.type) for bulk_column in BULK_COLUMNS],
+            name='data'
+        ).data([
+            (item.id, *[getattr(item, bulk_column.key) for bulk_column in BULK_COLUMNS])
+            for _, item in rows
+        ])
+        updated = set(await self.db.scalars(
+            update(Product)
+            .where(Product.id == data.c.id, Product.company_id == company_id)
+            .values({
+                # Postgres types VALUES column holding only NULLs as text
+                **{bulk_column.key: cast(data.c[bulk_column.key], bulk_column.type) for bulk_column in BULK_COLUMNS},
+                'updated_at': func.now(),
+                'version': Product.version + 1
+            })
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        ))
+
+        return [
+            {'index': index, 'status': 'updated', 'id': item.id}
+            if item.id in updated else
+            {'index': index, 'status': 'not_found', 'id': item.id, 'errors': ['Product not found']}
+            for index, item in rows
+        ]
+
+    async def get_product(self, company_id: int, product_id: int) -> Product | HTTPException:
+        product = await self.get_company_product(company_id=company_id, product_id=product_id)
         return product
 
-    def put_product(self, company_id: int, product_id: int, schema: ProductPutUpdate) -> Product | HTTPException:
-
-        self.check_company_id(company_id=company_id)
-
-        product = (
-            self.db.query(Product)
-            .filter(Product.company_id == company_id, Product.id == product_id)
-            .first()
-        )
+    async def get_product_version(self, company_id: int, product_id: int) -> tuple[int, datetime | None] | None:
+        row = (await self.db.execute(
+            select(Product.version, Product.updated_at)
+            .where(Product.company_id == company_id, Product.id == product_id)
+        )).first()
+
+        if row is None:
+            return None
+        return row.version, row.updated_at
+
+    async def update_product(
+        self,
+        company_id: int,
+        product_id: int,
+        values: dict[str, Any],
+        versions: list[int] | None = None
+    ) -> Product | HTTPException:
+        criteria = [Product.company_id == company_id, Product.id == product_id]
+        if versions is not None:
+            criteria.append(Product.version.in_(versions))
+
+        product = await self.update_returning(Product, values, *criteria)
 
         if not product:
-            return not_found_exception()
-
-        for key, value in schema.model_dump(exclude_unset=True).items():
-            setattr(product, key, value)
+            # missing company or product raise 404 here, existing row means stale version
+            await self.get_company_product(company_id=company_id, product_id=product_id)
+            return precondition_failed_exception()
 
-        self.db.commit()
-        self.db.refresh(product)
+        await self.db.commit()
+        await cache.delete(product_key(company_id, product_id))
 
         return product
 
-    def patch_product(self, company_id: int, product_id: int, schema: ProductUpdate) -> Product | HTTPException:
-
-        self.check_company_id(company_id=company_id)
-
-        product = (
-            self.db.query(Product)
-            .filter(Product.company_id == company_id, Product.id == product_id)
-            .first()
-        )
-
-        if not product:
-            return not_found_exception()
-
-        for key, value in schema.model_dump().items():
-            setattr(product, key, value)
-
-        self.db.commit()
-        self.db.refresh(product)
-
+    async def put_product(
+        self,
+        company_id: int,
+        product_id: int,
+        schema: ProductPutUpdate,
+        versions: list[int] | None = None
+    ) -> Product | HTTPException:
+        product = await self.update_product(company_id, product_id, schema.model_dump(exclude_unset=True), versions)
         return product
 
-    def delete_product(self, company_id: int, product_id: int) -> None | HTTPException:
-
-        self.check_company_id(company_id=company_id)
-
-        product = (
-            self.db.query(Product)
-            .filter(Product.company_id == company_id, Product.id == product_id)
-            .first()
-        )
-
-        if not product:
-            return not_found_exception()
+    async def patch_product(
+        self,
+        company_id: int,
+        product_id: int,
+        schema: ProductUpdate,
+        versions: list[int] | None = None
+    ) -> Product | HTTPException:
+        product = await self.update_product(company_id, product_id, schema.model_dump(exclude_unset=True), versions)
+        return product
 
-        self.db.delete(product)
-        self.db.commit()
+    async def delete_product(
+        self,
+        company_id: int,
+        product_id: int,
+        versions: list[int] | None = None
+    ) -> None | HTTPException:
+
+        product = await self.get_company_product(company_id=company_id, product_id=product_id)
+        if versions is not None and product.version not in versions:
+            return precondition_failed_exception()
+
+        await self.db.delete(product)
+        try:
+            await self.db.commit()
+        except StaleDataError:
+            # DELETE is guarded by loaded version, row changed after it was read
+            await self.db.rollback()
+            return precondition_failed_exception()
+        await cache.delete(product_key(company_id, product_id))
 
         return None
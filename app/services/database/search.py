@@ -0,0 +1,67 @@
+from sqlalchemy import (
+    REAL,
+    and_,
+    cast,
+    func,
+    literal,
+    literal_column,
+    null,
+    or_,
+    select,
+    tuple_,
+    union_all,
+)
+
+from app.models.company import Company
+from app.models.product import Product
+from app.schemas.search import SearchKind
+from app.services.root import DatabaseCRUD
+
+# text search configuration the search_vector columns are generated with
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
+class SearchCRUD(DatabaseCRUD):
+    async def search(self, q: str, limit: int, after: tuple[float, str, int] | None = None) -> list:
+        """Companies and products matching `q`, best ranked first.
+
+        Hits are ordered by (rank desc, kind, id), `after` is that key of the last hit seen.
+        """
+
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        companies = (
+            select(
+                literal(SearchKind.COMPANY.value).label('kind'),
+                Company.id,
+                null().label('company_id'),
+                Company.name,
+                Company.description,
+                func.ts_rank_cd(Company.search_vector, ts_query).label('rank')
+            )
+            .where(Company.search_vector.op('@@')(ts_query))
+        )
+        products = (
+            select(
+                literal(SearchKind.PRODUCT.value).label('kind'),
+                Product.id,
+                Product.company_id,
+                Product.name,
+                Product.description,
+                func.ts_rank_cd(Product.search_vector, ts_query).label('rank')
+            )
+            .where(Product.search_vector.op('@@')(ts_query))
+        )
+        hits = union_all(companies, products).subquery()
+
+        query = select(hits).order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id)
+        if after is not None:
+            rank, kind, last_id = after
+            # ts_rank_cd is float4, comparing in float8 would never find equal rank
+            rank = cast(rank, REAL)
+            query = query.where(or_(
+                hits.c.rank < rank,
+                and_(hits.c.rank == rank, tuple_(hits.c.kind, hits.c.id) > tuple_(kind, last_id))
+            ))
+
+        result = (await self.db.execute(query.limit(limit))).all()
+        return result
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Row, delete, select, update
+
+from app.models.user import RefreshTokens, User
+from app.services.root import DatabaseCRUD
+
+
+class UserCRUD(DatabaseCRUD):
+    async def get_user(self, user_id: int) -> User | None:
+        user = await self.db.scalar(select(User).where(User.id == user_id))
+        return user
+
+    async def get_user_by_username(self, username: str) -> User | None:
+        user = await self.db.scalar(select(User).where(User.username == username))
+        return user
+
+    async def create_user(self, username: str, hashed_password: str) -> User:
+        new_user = User(
+            username=username,
+            hashed_password=hashed_password
+        )
+
+        self.db.add(new_user)
+        await self.db.flush()
+        await self.db.refresh(new_user)
+        await self.db.commit()
+
+        return new_user
+
+    async def update_password_hash(self, user: User, hashed_password: str) -> None:
+        user.hashed_password = hashed_password
+        await self.db.commit()
+
+    async def store_refresh_token(
+        self,
+        token_hash: str,
+        user_id: int,
+        family: str,
+        expires_at: datetime
+    ) -> None:
+        self.db.add(RefreshTokens(token_hash=token_hash, user_id=user_id, family=family, expires_at=expires_at))
+        await self.db.commit()
+
+    async def consume_refresh_token(self, token_hash: str) -> Row | None:
+        """Marking unused, unexpired token as used, transaction is left open for its successor."""
+
+        now = datetime.now(timezone.utc)
+        result = await self.db.execute(
+            update(RefreshTokens)
+            .where(
+                RefreshTokens.token_hash == token_hash,
+                RefreshTokens.used_at.is_(None),
+                RefreshTokens.expires_at > now
+            )
+            .values(used_at=now)
+            .returning(RefreshTokens.user_id, RefreshTokens.family)
+            .execution_options(synchronize_session=False)
+        )
+        return result.first()
+
+    async def delete_refresh_family(self, family: str) -> None:
+        await self.db.execute(delete(RefreshTokens).where(RefreshTokens.family == family))
+        await self.db.commit()
+
+    async def delete_expired_refresh_tokens(self, batch_size: int) -> int:
+        """Deleting one batch of expired tokens, rows locked by others are left for the next pass."""
+
+        expired = (
+            select(RefreshTokens.id)
+            .where(RefreshTokens.expires_at < datetime.now(timezone.utc))
+            .order_by(RefreshTokens.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            delete(RefreshTokens)
+            .where(RefreshTokens.id.in_(expired.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
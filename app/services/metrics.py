@@ -0,0 +1,186 @@
+import os
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import cache
+from typing import Any
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNMATCHED_ROUTE = 'unmatched'
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'Finished HTTP requests.',
+    ['method', 'route', 'status']
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Time from receiving request to sending the last body chunk.',
+    ['method', 'route']
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being handled, route is not known before routing.',
+    ['method'],
+    multiprocess_mode='livesum'
+)
+DB_QUERY_SECONDS = Histogram(
+    'db_query_duration_seconds',
+    'Time of single SQL statement execution.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+DB_REQUEST_QUERIES = Histogram(
+    'db_request_queries',
+    'SQL statements executed while handling one request.',
+    ['method', 'route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+DB_REQUEST_SECONDS = Histogram(
+    'db_request_duration_seconds',
+    'Time spent in SQL statements while handling one request.',
+    ['method', 'route']
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    'db_pool_checkout_duration_seconds',
+    'Time to get connection from pool, waiting and connecting included.',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    'password_hash_duration_seconds',
+    'Time of bcrypt hashing on its worker thread.',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class RequestQueries:
+    """SQL statements counted for the request running in current context."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+
+request_queries: ContextVar[RequestQueries | None] = ContextVar('request_queries', default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info['query_started'] = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.pop('query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    DB_QUERY_SECONDS.observe(elapsed)
+    queries = request_queries.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Timing statements of `engine`, sync engine of AsyncEngine is passed for async mode."""
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    return engine
+
+
+def timed(histogram: Histogram, fn: Callable, *args) -> Any:
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of route handling request, raw paths would make a series per id.
+
+    Router puts matched route into scope, reading it afterwards
+    saves matching every route once more.
+    """
+
+    route = scope.get('route')
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+@cache
+def route_metrics(method: str, route: str, status: int) -> tuple:
+    """Labelled children, `labels` takes a lock on every call, routes are few."""
+
+    return (
+        HTTP_REQUEST_SECONDS.labels(method, route),
+        HTTP_REQUESTS.labels(method, route, str(status)),
+        DB_REQUEST_QUERIES.labels(method, route),
+        DB_REQUEST_SECONDS.labels(method, route),
+    )
+
+
+class MetricsMiddleware:
+    """Request count, latency and SQL time per route template.
+
+    Sessions run statements in threadpool or greenlets, both
+    copy context, so engine events find the request's counters.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        method = scope['method']
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        queries = RequestQueries()
+        token = request_queries.set(queries)
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            request_queries.reset(token)
+            request_seconds, requests, request_queries_count, request_queries_seconds = route_metrics(
+                method,
+                route_template(scope),
+                status
+            )
+            request_seconds.observe(elapsed)
+            requests.inc()
+            request_queries_count.observe(queries.count)
+            request_queries_seconds.observe(queries.seconds)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry to expose, samples of all workers are merged when they share PROMETHEUS_MULTIPROC_DIR."""
+
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
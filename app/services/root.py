@@ -1,8 +1,16 @@
+from typing import Any
+
+from sqlalchemy import Row, Select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.config.database import as_async_session
+
 
 class ServiceSessionContext:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session | AsyncSession) -> None:
         self.db = db
 
 
@@ -13,11 +21,63 @@ class AppService(ServiceSessionContext):
 class DBSessionContext:
     """Context for database session."""
 
-    def __init__(self, db: Session) -> None:
-        """Initialization for session of connection to database."""
+    def __init__(self, db: Session | AsyncSession) -> None:
+        """Initialization for session of connection to database.
 
-        self.db = db
+        Blocking sessions are wrapped so that CRUD code awaits
+        the same calls in sync and async database modes.
+        """
+
+        self.db = as_async_session(db)
 
 
 class DatabaseCRUD(DBSessionContext):
-    pass
+    async def update_returning(self, model: type, values: dict[str, Any], *criteria) -> Any | None:
+        """Row changed by single UPDATE ... RETURNING, None when no row matched."""
+
+        version_column = sa_inspect(model).version_id_col
+        if version_column is not None:
+            # bulk UPDATE bypasses unit of work, so version counter is bumped here
+            values = {**values, version_column.key: version_column + 1}
+
+        row = await self.db.scalar(
+            update(model)
+            .where(*criteria)
+            .values(**values)
+            .returning(model)
+            .execution_options(synchronize_session=False)
+        )
+        return row
+
+    async def keyset_page(self, query: Select, phases: list, limit: int) -> list[Row]:
+        """Page of `query` after keyset cursor, next phase runs only while page isn't full."""
+
+        rows = []
+        for condition in phases:
+            rows += (await self.db.execute(query.where(condition).limit(limit - len(rows)))).all()
+            if len(rows) >= limit:
+                break
+        return rows
+
+    async def table_row_estimate(self, table_name: str) -> int | None:
+        """Row count kept in planner statistics, None if table was never analyzed."""
+
+        reltuples = await self.db.scalar(
+            text('SELECT reltuples FROM pg_class WHERE oid = CAST(:table_name AS regclass)'),
+            {'table_name': table_name}
+        )
+        if reltuples is None or reltuples < 0:
+            return None
+        return int(reltuples)
+
+    async def plan_row_estimate(self, statement: Select) -> int:
+        """Row count the planner expects statement to return."""
+
+        compiled = statement.compile(
+            dialect=self.db.get_bind().dialect,
+            compile_kwargs={'literal_binds': True}
+        )
+        plan = await self.db.run_sync(
+            lambda session: session.connection().exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}').scalar()
+        )
+        return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config.core import BCRYPT_QUEUE_SIZE, BCRYPT_ROUNDS, BCRYPT_WORKERS
+from app.services.metrics import PASSWORD_HASH_SECONDS, timed
+
+
+class PasswordHasher:
+    """Running bcrypt on dedicated threads with bounded backlog.
+
+    bcrypt releases the GIL, so threads hash in parallel while
+    request threadpool and event loop stay free for other endpoints.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, queue_size: int) -> None:
+        self.context = context
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.max_pending = workers + queue_size
+        self.pending = 0
+
+    async def run(self, operation: str, fn: Callable, *args) -> Any:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=429,
+                detail='Too many authentication requests, try again later.',
+                headers={'Retry-After': '1'}
+            )
+        self.pending += 1
+        try:
+            # timed on the worker thread, waiting in the queue is not bcrypt time
+            histogram = PASSWORD_HASH_SECONDS.labels(operation)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed, histogram, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run('hash', self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Checking password, new hash is returned when stored one uses outdated settings."""
+
+        return await self.run('verify', self.context.verify_and_update, password, hashed_password)
+
+
+bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__rounds=BCRYPT_ROUNDS)
+
+password_hasher = PasswordHasher(bcrypt_context, workers=BCRYPT_WORKERS, queue_size=BCRYPT_QUEUE_SIZE)
+
+
+def hash_token(token: str) -> str:
+    """Lookup key of refresh token.
+
+    Tokens are long random signed strings, plain sha256 is enough
+    and keeps lookup a single indexed equality.
+    """
+
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,62 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import HTTPException, Request
+
+from app.config.core import BULK_MAX_ROWS
+
+NDJSON_MEDIA_TYPES = {'application/x-ndjson', 'application/jsonl', 'application/json-seq'}
+
+
+def too_many_rows_exception() -> HTTPException:
+    raise HTTPException(status_code=413, detail=f'Bulk request is limited to {BULK_MAX_ROWS} rows.')
+
+
+def invalid_payload_exception() -> HTTPException:
+    raise HTTPException(status_code=400, detail='Expected JSON array or NDJSON body.')
+
+
+async def iter_ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Splitting streamed body into lines without buffering it whole."""
+
+    pending = b''
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line
+    yield pending
+
+
+async def read_bulk_rows(request: Request) -> list[Any]:
+    """Decoded rows of JSON array or NDJSON body.
+
+    Line that is not valid JSON is kept as the raised error,
+    so it is reported against its position instead of failing the batch.
+    """
+
+    media_type = request.headers.get('content-type', '').split(';')[0].strip()
+
+    if media_type in NDJSON_MEDIA_TYPES:
+        rows = []
+        async for line in iter_ndjson_lines(request):
+            if not line.strip():
+                continue
+            if len(rows) >= BULK_MAX_ROWS:
+                return too_many_rows_exception()
+            try:
+                rows.append(json.loads(line))
+            except ValueError as error:
+                rows.append(error)
+        return rows
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        return invalid_payload_exception()
+    if not isinstance(rows, list):
+        return invalid_payload_exception()
+    if len(rows) > BULK_MAX_ROWS:
+        return too_many_rows_exception()
+    return rows
@@ -0,0 +1,208 @@
+import zlib
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.core import (
+    BROTLI_QUALITY,
+    COMPRESSION_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    ZSTD_LEVEL,
+)
+from app.services.cache import CacheBackend, compressed_cache
+from app.utils.conditional import CONTENT_CODINGS, coded_etag, strip_coding
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+class GzipEncoder:
+    def __init__(self) -> None:
+        # wbits 31 writes gzip container with zero mtime, equal bodies compress equally
+        self.compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self) -> None:
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self.compressor.process(data) + self.compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self) -> None:
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+ENCODERS = {
+    'zstd': ZstdEncoder,
+    'br': BrotliEncoder,
+    'gzip': GzipEncoder,
+}
+
+
+def negotiate_coding(accept_encoding: str, available: tuple[str, ...] = CONTENT_CODINGS) -> str | None:
+    """Coding with the highest q-value, server preference breaks ties."""
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    if 'content-encoding' in headers:
+        return False
+    content_type = headers.get('content-type', '')
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Content coding negotiation for JSON and text responses.
+
+    Complete bodies below `minimum_size` go out as they are. Streamed
+    bodies are compressed chunk by chunk and flushed, so export keeps
+    streaming. Bodies of responses carrying ETag are cached compressed:
+    URL and validator identify the bytes, hot pages get compressed once.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        cache: CacheBackend = compressed_cache
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        responder = CompressionResponder(self, scope, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        self.middleware = middleware
+        self.coding = None
+        if scope['method'] != 'HEAD':
+            self.coding = negotiate_coding(request_headers.get('accept-encoding', ''))
+        self.if_none_match = request_headers.get('if-none-match', '')
+        self.url = scope['path'] + '?' + scope['query_string'].decode('latin-1')
+        self.downstream = send
+        self.start: Message | None = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start = message
+            return
+        if message['type'] != 'http.response.body':
+            return await self.downstream(message)
+        if self.start is not None:
+            return await self.send_first(message)
+        if self.passthrough:
+            return await self.downstream(message)
+
+        more_body = message.get('more_body', False)
+        body = message.get('body', b'')
+        chunk = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+        await self.downstream({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+    async def send_first(self, message: Message) -> None:
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start['headers'])
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if not is_compressible(headers) and start['status'] != 304:
+            self.passthrough = True
+            await self.downstream(start)
+            return await self.downstream(message)
+        headers.add_vary_header('Accept-Encoding')
+
+        if start['status'] == 304:
+            self.revalidated_etag(headers)
+            self.passthrough = True
+        elif self.coding is None or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+        elif more_body:
+            self.encoder = ENCODERS[self.coding]()
+            self.set_coding(headers)
+            del headers['content-length']
+            message = {'type': 'http.response.body', 'body': self.encoder.compress(body), 'more_body': True}
+        else:
+            body = await self.compressed(body, headers.get('etag'))
+            self.set_coding(headers)
+            headers['content-length'] = str(len(body))
+            message = {'type': 'http.response.body', 'body': body, 'more_body': False}
+
+        await self.downstream(start)
+        await self.downstream(message)
+
+    def set_coding(self, headers: MutableHeaders) -> None:
+        headers['content-encoding'] = self.coding
+        if 'etag' in headers:
+            headers['etag'] = coded_etag(headers['etag'], self.coding)
+
+    def revalidated_etag(self, headers: MutableHeaders) -> None:
+        """304 names the variant client has stored, that is the one it sent."""
+
+        etag = headers.get('etag')
+        if etag is None or etag.startswith('W/'):
+            return
+        for tag in self.if_none_match.split(','):
+            tag = tag.strip().removeprefix('W/')
+            if tag != etag and strip_coding(tag) == etag:
+                headers['etag'] = tag
+                return
+
+    async def compressed(self, body: bytes, etag: str | None) -> bytes:
+        if etag is None:
+            return ENCODERS[self.coding]().finish(body)
+        key = f'{self.coding}:{self.url}:{etag}'
+        cached = await self.middleware.cache.get(key)
+        if cached is not None:
+            return cached
+        compressed = ENCODERS[self.coding]().finish(body)
+        await self.middleware.cache.set(key, compressed)
+        return compressed
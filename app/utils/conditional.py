@@ -0,0 +1,118 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response
+
+# content codings known to `coded_etag`, in order of server preference
+CONTENT_CODINGS = ('zstd', 'br', 'gzip')
+
+
+def precondition_failed_exception() -> HTTPException:
+    raise HTTPException(status_code=412, detail='Resource was modified, fetch it again.')
+
+
+def make_etag(*parts) -> str:
+    """Weak validator built from values identifying representation."""
+
+    digest = hashlib.blake2b('|'.join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def entity_etag(version: int) -> str:
+    """Strong validator of single row, its version counter is the tag itself."""
+
+    return f'"{version}"'
+
+
+def coded_etag(etag: str, coding: str) -> str:
+    """Validator of content coded representation.
+
+    Strong tags get coding suffix, bytes differ from identity ones.
+    Weak tags only promise equivalence and stay as they are.
+    """
+
+    if etag.startswith('W/'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def strip_coding(tag: str) -> str:
+    """Tag of identity representation behind `coded_etag` result."""
+
+    for coding in CONTENT_CODINGS:
+        suffix = f'-{coding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def page_etag(*parts, rows: list) -> str:
+    """Validator of list page, rows are identified by id and version."""
+
+    return make_etag(*parts, *[(row.id, row.version) for row in rows])
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison against every tag listed in If-None-Match."""
+
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(strip_coding(tag.strip().removeprefix('W/')) == opaque for tag in header.split(','))
+
+
+def if_match_versions(request: Request) -> list[int] | None:
+    """Row versions accepted by If-Match, None when any version is.
+
+    Comparison is strong, so weak tags never match. Tags of compressed
+    representations name the same version.
+    """
+
+    header = request.headers.get('if-match')
+    if header is None or header.strip() == '*':
+        return None
+    versions = []
+    for tag in header.split(','):
+        tag = strip_coding(tag.strip())
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+
+def has_validators(request: Request) -> bool:
+    return 'if-none-match' in request.headers or 'if-modified-since' in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """Evaluating conditional GET headers, If-None-Match takes precedence."""
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> dict[str, str]:
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: datetime | None = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
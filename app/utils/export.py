@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import Row
+
+from app.schemas.export import ExportFormat
+
+
+def json_default(value: Any) -> Any:
+    """Serializing values the way response models do."""
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def ndjson_chunk(columns: list[str], rows: list[Row]) -> str:
+    return ''.join(
+        json.dumps(dict(zip(columns, row)), default=json_default, separators=(',', ':')) + '\n'
+        for row in rows
+    )
+
+
+def csv_chunk(columns: list[str] | None, rows: list[Row]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if columns:
+        writer.writerow(columns)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_chunks(
+    partitions: AsyncIterator[list[Row]],
+    columns: list[str],
+    export_format: ExportFormat
+) -> AsyncIterator[str]:
+    """Encoding each partition as it arrives, nothing is kept between them."""
+
+    if export_format == ExportFormat.CSV:
+        yield csv_chunk(columns, [])
+    async for rows in partitions:
+        if export_format == ExportFormat.CSV:
+            yield csv_chunk(None, rows)
+        else:
+            yield ndjson_chunk(columns, rows)
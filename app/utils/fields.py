@@ -0,0 +1,67 @@
+from enum import Enum
+from typing import Any
+from urllib.parse import urlencode
+
+from fastapi import HTTPException
+from sqlalchemy.orm import load_only
+
+SUMMARY = 'summary'
+ALL = 'all'
+FIELDS_DESCRIPTION = 'Comma separated field names, or `summary` / `all` projection.'
+
+
+def invalid_fields_exception(unknown: set[str]) -> HTTPException:
+    raise HTTPException(status_code=400, detail=f'Unknown fields: {", ".join(sorted(unknown))}.')
+
+
+def parse_fields(
+    value: str | None,
+    available: tuple[str, ...],
+    summary: tuple[str, ...],
+    default: str = ALL
+) -> tuple[str, ...]:
+    """Fields requested by comma separated `fields` parameter, `id` is always included.
+
+    Named projections `summary` and `all` are accepted as well.
+    Result keeps schema order, so rendered keys don't depend on request.
+    """
+
+    value = value or default
+    if value == ALL:
+        return available
+    if value == SUMMARY:
+        return summary
+
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested.difference(available)
+    if unknown:
+        return invalid_fields_exception(unknown)
+    requested.add('id')
+    return tuple(name for name in available if name in requested)
+
+
+def fields_query(value: str | None) -> str:
+    """`fields` part of pagination links."""
+
+    return f'&{urlencode({"fields": value})}' if value else ''
+
+
+def include_query(include: Enum | None, limit: int) -> str:
+    """`include` part of pagination links."""
+
+    return f'&include={include.value}&products_limit={limit}' if include else ''
+
+
+def load_fields(model, fields: tuple[str, ...], *required: str):
+    """Loader option selecting only requested columns, anything else raises instead of lazy loading."""
+
+    names = {*fields, 'id', *required}
+    return load_only(*[getattr(model, name) for name in sorted(names)], raiseload=True)
+
+
+def project(row, fields: tuple[str, ...]) -> dict[str, Any]:
+    """Requested part of loaded row or cached representation."""
+
+    if isinstance(row, dict):
+        return {name: row[name] for name in fields}
+    return {name: getattr(row, name) for name in fields}
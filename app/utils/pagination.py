@@ -0,0 +1,73 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import and_, tuple_
+
+
+def invalid_cursor_exception() -> HTTPException:
+    raise HTTPException(status_code=400, detail='Invalid cursor.')
+
+
+def encode_cursor(order_by: str, values: list[Any]) -> str:
+    """Packing sort key of the last row into opaque token."""
+
+    raw = json.dumps([order_by, values], separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort_keys: set[str]) -> tuple[str, list[Any]]:
+    """Unpacking token made by `encode_cursor`."""
+
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        order_by, values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return invalid_cursor_exception()
+
+    if order_by not in sort_keys or not isinstance(values, list) or len(values) != 2:
+        return invalid_cursor_exception()
+    if not isinstance(values[0], str | int | float | None) or not isinstance(values[1], int):
+        return invalid_cursor_exception()
+
+    return order_by, values
+
+
+def keyset_order(sort_column, id_column) -> tuple:
+    """Ordering matching `keyset_phases`, `id` breaks ties."""
+
+    if sort_column is id_column:
+        return (id_column.asc(),)
+    return (sort_column.asc().nulls_last(), id_column.asc())
+
+
+def keyset_phases(sort_column, id_column, values: list[Any]) -> list:
+    """Conditions of consecutive queries reading rows placed after `values` in `keyset_order`.
+
+    Row comparison is taken by (sort column, id) index as range start, OR-ing
+    NULL sort values into it would leave a filter over every row before cursor.
+    NULLs can't be compared and sort last, so they are read by the next phase.
+    """
+
+    value, last_id = values
+    # cursor carries JSON values, e.g. Decimal comes back as string
+    python_type = sort_column.type.python_type
+    if value is not None and not isinstance(value, python_type):
+        value = python_type(value)
+    if sort_column is id_column:
+        return [id_column > last_id]
+    if value is None:
+        return [and_(sort_column.is_(None), id_column > last_id)]
+    return [tuple_(sort_column, id_column) > (value, last_id), sort_column.is_(None)]
+
+
+def next_cursor(rows: list, limit: int, order_by: str) -> tuple[list, str | None]:
+    """Trimming look-ahead row and building token for the next page."""
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(order_by, [getattr(last, order_by), last.id])
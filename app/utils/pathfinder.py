@@ -1,10 +1,12 @@
+from functools import cache
 from typing import Callable
 
-from app.main import app
-
 
+@cache
 def get_routes() -> dict[str, str]:
-    """Getting dict of paths of app."""
+    """Getting dict of paths of app, built once on first use."""
+
+    from app.main import app
 
     routes = {}
     for route in app.routes:
@@ -14,10 +16,10 @@ def get_routes() -> dict[str, str]:
 
 def reverse(
     func: Callable,
-    routes: dict[str, str] = get_routes(),
+    routes: dict[str, str] | None = None,
     **kwargs
 ) -> str:
     """Getting url from routes."""
 
-    path = routes[func.__name__]
+    path = (routes or get_routes())[func.__name__]
     return path.format(**kwargs)
@@ -0,0 +1,13 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as BaseORJSONResponse
+
+from app.utils.export import json_default
+
+
+class ORJSONResponse(BaseORJSONResponse):
+    """orjson rendering matching response models: Decimal as string, UTC as `Z`."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
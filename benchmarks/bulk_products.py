@@ -0,0 +1,64 @@
+"""Comparing product ingestion through single-row and bulk endpoints.
+
+Runs against database configured by POSTGRES_* variables and leaves
+created rows behind, so point it at a scratch database:
+
+    python -m benchmarks.bulk_products 5000
+"""
+import json
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.product import bulk_upsert_products, create_product
+from app.utils.pathfinder import reverse
+from benchmarks.common import make_company_and_token
+
+
+def make_rows(company_id: int, rows: int) -> list[dict]:
+    return [
+        {
+            'name': f'benchProduct{i}',
+            'description': 'bulk ingestion benchmark',
+            'price': '9.99',
+            'discount': 0,
+            'quantity': i,
+            'company_id': company_id
+        }
+        for i in range(rows)
+    ]
+
+
+def run(rows: int) -> None:
+    company_id, token = make_company_and_token()
+    client = TestClient(app=app, headers={'Authorization': f'Bearer {token}'})
+    payload = make_rows(company_id, rows)
+
+    started = time.perf_counter()
+    for row in payload:
+        client.post(reverse(create_product, company_id=company_id), json=row)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post(reverse(bulk_upsert_products, company_id=company_id), json=payload)
+    bulk_json = time.perf_counter() - started
+    assert response.json()['created'] == rows, response.text
+
+    started = time.perf_counter()
+    response = client.post(
+        reverse(bulk_upsert_products, company_id=company_id),
+        content='\n'.join(json.dumps(row) for row in payload),
+        headers={'Content-Type': 'application/x-ndjson'}
+    )
+    bulk_ndjson = time.perf_counter() - started
+    assert response.json()['created'] == rows, response.text
+
+    print(f'{rows} rows')
+    for name, elapsed in (('single-row POST', single), ('bulk JSON', bulk_json), ('bulk NDJSON', bulk_ndjson)):
+        print(f'{name:>16}: {elapsed:8.3f}s {rows / elapsed:10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
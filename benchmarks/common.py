@@ -0,0 +1,21 @@
+import uuid
+from datetime import timedelta
+
+from app.config.database import SessionLocal
+from app.models.company import Company
+from app.models.user import User
+from app.routers.auth import create_token
+
+
+def make_company_and_token() -> tuple[int, str]:
+    """Fresh company and access token of fresh user, benchmarks never share rows."""
+
+    session = SessionLocal()
+    user = User(username=f'bench.{uuid.uuid4().hex[:8]}', hashed_password='-', role='user')
+    company = Company(name='benchCompany', description='benchmark company')
+    session.add_all([user, company])
+    session.commit()
+    token = create_token(username=user.username, user_id=user.id, role='user', expires_delta=timedelta(hours=1))
+    company_id = company.id
+    session.close()
+    return company_id, token
@@ -0,0 +1,86 @@
+"""Latency of concurrent PUT/PATCH requests to products and companies.
+
+Requests go through the ASGI app in process, so numbers cover routing,
+validation and database work but not network. Uses database configured
+by POSTGRES_* variables and leaves created rows behind:
+
+    python -m benchmarks.concurrent_writes 2000 32
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.config.database import SessionLocal
+from app.main import app
+from app.models.product import Product
+from app.routers.company import patch_company
+from app.routers.product import patch_product, put_product
+from app.utils.pathfinder import reverse
+from benchmarks.common import make_company_and_token
+
+
+def make_products(company_id: int, count: int) -> list[int]:
+    session = SessionLocal()
+    products = [
+        Product(name=f'benchProduct{i}', description='write benchmark', price='1.00', company_id=company_id)
+        for i in range(count)
+    ]
+    session.add_all(products)
+    session.commit()
+    ids = [product.id for product in products]
+    session.close()
+    return ids
+
+
+async def measure(requests: int, concurrency: int) -> dict[str, list[float]]:
+    company_id, token = make_company_and_token()
+    product_ids = make_products(company_id, concurrency)
+    latencies: dict[str, list[float]] = {'PUT product': [], 'PATCH product': [], 'PATCH company': []}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url='http://bench',
+        headers={'Authorization': f'Bearer {token}'}
+    ) as client:
+
+        async def send(i: int) -> None:
+            product_id = product_ids[i % concurrency]
+            kind, method, url, body = [
+                ('PUT product', 'PUT', reverse(put_product, company_id=company_id, product_id=product_id),
+                 {'name': f'put{i}', 'description': 'put', 'price': '2.00'}),
+                ('PATCH product', 'PATCH', reverse(patch_product, company_id=company_id, product_id=product_id),
+                 {'quantity': i}),
+                ('PATCH company', 'PATCH', reverse(patch_company, company_id=company_id),
+                 {'description': f'patch{i}'}),
+            ][i % 3]
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.request(method, url, json=body)
+                latencies[kind].append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+        await asyncio.gather(*(send(i) for i in range(requests)))
+    return latencies
+
+
+def run(requests: int, concurrency: int) -> None:
+    started = time.perf_counter()
+    latencies = asyncio.run(measure(requests, concurrency))
+    elapsed = time.perf_counter() - started
+
+    print(f'{requests} requests, concurrency {concurrency}, {requests / elapsed:.0f} req/s')
+    for kind, values in latencies.items():
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1]
+        print(f'{kind:>14}: p50 {statistics.median(values) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    )
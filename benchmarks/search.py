@@ -0,0 +1,102 @@
+"""Latency of full-text search on synthetic catalog.
+
+Fills companies and products with generated rows server-side, then times
+search requests through the ASGI app. Uses database configured by POSTGRES_*
+variables, run it against scratch database:
+
+    python -m benchmarks.search 1000000 300
+"""
+import random
+import statistics
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config.database import engine
+from app.main import app
+from app.routers.search import search
+from app.utils.pathfinder import reverse
+
+SYLLABLES = [
+    'ka', 'lo', 'mi', 'ne', 'ru', 'to', 'sa', 'vi', 'de', 'po', 'li', 'ma', 'zu', 'ce', 'bo', 'fi',
+    'ga', 'hu', 'jo', 'ke', 'na', 'pe', 'qui', 'ri', 'so', 'ta', 'un', 've', 'wa', 'xe', 'yo', 'ze',
+    'ar', 'el', 'in', 'or', 'us', 'an', 'et', 'ol',
+]
+# head of the list is drawn far more often, like common words of real catalogs
+WORDS = [
+    'tea', 'coffee', 'mug', 'green', 'black', 'roast', 'blend', 'cup', 'leaf', 'bean',
+    'organic', 'spice', 'honey', 'vanilla', 'mint', 'lemon', 'ginger', 'cocoa', 'milk', 'sugar',
+] + [first + second for first in SYLLABLES for second in SYLLABLES]
+
+# names are 2-4 and descriptions 4-6 words drawn with cubic skew towards the head of WORDS,
+# `0 * i` keeps aggregate bound to the inner series instead of outer query
+FILL_PRODUCTS = text('''
+    INSERT INTO products (name, description, price, discount, quantity, company_id)
+    SELECT
+        (SELECT string_agg(w[1 + floor(power(random(), 3) * array_length(w, 1))::int + 0 * i], ' ')
+         FROM generate_series(1, 2 + (g % 3)) AS i),
+        (SELECT string_agg(w[1 + floor(power(random(), 3) * array_length(w, 1))::int + 0 * i], ' ')
+         FROM generate_series(1, 4 + (g % 3)) AS i),
+        round((random() * 100)::numeric, 2),
+        (g % 50),
+        (g % 20),
+        :first_company + (g % :companies)
+    FROM generate_series(1, :rows) AS g, (SELECT CAST(:words AS text[]) AS w) AS words
+''')
+
+
+def fill(rows: int, companies: int = 1000) -> None:
+    with engine.begin() as connection:
+        existing = connection.scalar(text('SELECT count(*) FROM products'))
+        if existing >= rows:
+            return
+        first_company = connection.scalar(
+            text(
+                "INSERT INTO companies (name, description) "
+                "SELECT 'Company ' || g, 'company number ' || g FROM generate_series(1, :n) g "
+                "RETURNING id"
+            ),
+            {'n': companies}
+        )
+        connection.execute(
+            FILL_PRODUCTS,
+            {'rows': rows - existing, 'words': WORDS, 'companies': companies, 'first_company': first_company}
+        )
+        connection.execute(text('ANALYZE companies'))
+        connection.execute(text('ANALYZE products'))
+
+
+def run(rows: int, requests: int) -> None:
+    started = time.perf_counter()
+    fill(rows)
+    print(f'catalog of {rows} products ready in {time.perf_counter() - started:.1f}s')
+
+    client = TestClient(app)
+    common, rare = WORDS[:20], WORDS[200:]
+    queries = {
+        'common word': lambda: random.choice(common),
+        'rare word': lambda: random.choice(rare),
+        'common pair': lambda: ' '.join(random.sample(common, 2)),
+        'mixed pair': lambda: f'{random.choice(common)} {random.choice(rare)}',
+        'phrase': lambda: '"' + ' '.join(random.sample(common, 2)) + '"',
+    }
+    for name, make_query in queries.items():
+        latencies = []
+        for _ in range(requests):
+            q = make_query()
+            started = time.perf_counter()
+            response = client.get(reverse(search), params={'q': q, 'limit': 20})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f'{name:>12}: p50 {statistics.median(latencies) * 1000:8.1f}ms  p95 {p95 * 1000:8.1f}ms')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    )
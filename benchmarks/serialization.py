@@ -0,0 +1,85 @@
+"""Comparing list page serialization through response model and orjson.
+
+No database is needed, rows are transient ORM objects:
+
+    python -m benchmarks.serialization
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+# resolves Product.company relationship
+from app.models.company import Company  # noqa: F401
+from app.models.product import Product
+from app.schemas.product import PRODUCT_FIELDS, PRODUCT_SUMMARY_FIELDS, ProductPaginated
+from app.utils.fields import project
+from app.utils.responses import ORJSONResponse
+
+PAGE_FIELD = create_response_field(name='page', type_=ProductPaginated)
+LOOP = asyncio.new_event_loop()
+
+
+def make_page(rows: int, fields: tuple[str, ...]) -> dict:
+    now = datetime.now()
+    products = [
+        Product(
+            id=i,
+            name=f'benchProduct{i}',
+            description='serialization benchmark ' * 4,
+            created_at=now,
+            updated_at=now,
+            price=Decimal('9.99'),
+            discount=5,
+            quantity=i,
+            company_id=1,
+            version=1
+        )
+        for i in range(rows)
+    ]
+    return {
+        'count': rows,
+        'results': [project(product, fields) for product in products],
+        'next_page': '/v1/companies/1/products?skip=10&limit=10',
+        'prev_page': None
+    }
+
+
+def response_model_path(page: dict) -> bytes:
+    """What FastAPI does with returned dict: validate, dump to jsonable, json.dumps."""
+
+    content = LOOP.run_until_complete(serialize_response(field=PAGE_FIELD, response_content=page, exclude_unset=True))
+    return JSONResponse(content).body
+
+
+def orjson_path(page: dict) -> bytes:
+    return ORJSONResponse(page).body
+
+
+def measure(func, page: dict, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(page)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def run(sizes: list[int]) -> None:
+    for fields_name, fields in (('summary', PRODUCT_SUMMARY_FIELDS), ('all', PRODUCT_FIELDS)):
+        for rows in sizes:
+            page = make_page(rows, fields)
+            repeat = max(10, 20000 // rows)
+            model_ms = measure(response_model_path, page, repeat)
+            orjson_ms = measure(orjson_path, page, repeat)
+            print(
+                f'{fields_name:>7} {rows:>5} rows: response model {model_ms:8.3f} ms, '
+                f'orjson {orjson_ms:8.3f} ms, x{model_ms / orjson_ms:.1f}'
+            )
+
+
+if __name__ == '__main__':
+    run([int(size) for size in sys.argv[1:]] or [10, 100, 1000])
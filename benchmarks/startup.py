@@ -0,0 +1,90 @@
+"""Measuring cold start: import time of the application and time to first request.
+
+Every run starts fresh interpreter, the way new worker does:
+
+    python -m benchmarks.startup 5
+
+Slowest imports are taken from `python -X importtime`.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.config.core import POOL_STATS_LINK
+
+IMPORT_SCRIPT = 'import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def import_seconds() -> float:
+    output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], capture_output=True, text=True, check=True)
+    return float(output.stdout)
+
+
+def slowest_imports(count: int = 10) -> list[tuple[int, str]]:
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app.main'],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative, name = line.removeprefix('import time:').split('|')
+        if not name.startswith('  '):
+            # top level import closes the block of its children, only app.main's are kept
+            if name.strip() == 'app.main':
+                rows.append((int(self_time), 'app.main (own code)'))
+                break
+            rows = []
+        elif not name.startswith('    '):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def first_request_seconds() -> float:
+    port = free_port()
+    url = f'http://127.0.0.1:{port}{POOL_STATS_LINK}'
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        env=os.environ.copy()
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    response.read()
+                return time.perf_counter() - started
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError('server exited before answering')
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(runs: int) -> None:
+    imports = [import_seconds() for _ in range(runs)]
+    first_requests = [first_request_seconds() for _ in range(runs)]
+    print(f'import app.main:        median {statistics.median(imports) * 1000:7.1f} ms')
+    print(f'time to first request: median {statistics.median(first_requests) * 1000:7.1f} ms')
+    print('slowest imports of app.main (cumulative):')
+    for microseconds, name in slowest_imports():
+        print(f'  {microseconds / 1000:7.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,98 @@
+"""initial schema
+
+Baseline of tables previously created by `Base.metadata.create_all`,
+databases created that way are marked with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 15:09:02.115000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0001'
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+weekdays_enum = postgresql.ENUM(
+    'all_week_days',
+    'monday',
+    'tuesday',
+    'wednesday',
+    'thursday',
+    'friday',
+    'saturday',
+    'sunday',
+    name='weekdays_enum'
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'companies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('schedule_start', sa.Time(), nullable=True),
+        sa.Column('schedule_end', sa.Time(), nullable=True),
+        sa.Column('schedule_weekdays', weekdays_enum, nullable=True),
+        sa.Column('phone_number', sa.String(), nullable=True),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('map_link', sa.String(), nullable=True),
+        sa.Column('social_media1', sa.String(), nullable=True),
+        sa.Column('social_media2', sa.String(), nullable=True),
+        sa.Column('social_media3', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_companies_id', 'companies', ['id'])
+    op.create_index('ix_companies_name', 'companies', ['name'])
+
+    op.create_table(
+        'products',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('price', sa.DECIMAL(precision=10, scale=2), nullable=True),
+        sa.Column('discount', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_products_id', 'products', ['id'])
+    op.create_index('ix_products_name', 'products', ['name'])
+
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=True),
+        sa.Column('role', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_index('ix_user_id', 'user', ['id'])
+
+    op.create_table(
+        'refresh_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_refresh_tokens_id', 'refresh_tokens', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('refresh_tokens')
+    op.drop_table('user')
+    op.drop_table('products')
+    op.drop_table('companies')
+    weekdays_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,38 @@
+"""indexes for hot query predicates
+
+Built with CREATE INDEX CONCURRENTLY, which can't run inside
+transaction, so each one gets its own autocommit block.
+Failed concurrent build leaves INVALID index behind: drop it and rerun.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:09:02.115000
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = '0002'
+down_revision: str | None = '0001'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+INDEXES = [
+    # company filter and keyset pagination of product lists
+    ('ix_products_company_id_id', 'products', ['company_id', 'id']),
+    ('ix_refresh_tokens_token', 'refresh_tokens', ['token']),
+    ('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""version counters and modification time for optimistic concurrency
+
+Constant default makes ADD COLUMN metadata-only, existing rows start at 1.
+now() is stable within the transaction, so companies.updated_at is added
+the same way and existing rows get migration time.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:13:07.247000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0003'
+down_revision: str | None = '0002'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('companies', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column(
+        'companies',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('companies', 'updated_at')
+    op.drop_column('products', 'version')
+    op.drop_column('companies', 'version')
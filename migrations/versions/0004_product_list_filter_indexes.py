@@ -0,0 +1,60 @@
+"""indexes for filtered and sorted product lists
+
+Trigram index needs pg_trgm from contrib, it's skipped with warning
+where extension isn't available.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:16:11.496000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import context, op
+
+revision: str = '0004'
+down_revision: str | None = '0003'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+INDEXES = [
+    ('ix_products_company_id_name_id', ['company_id', 'name', 'id']),
+    ('ix_products_company_id_price_id', ['company_id', 'price', 'id']),
+]
+
+
+def trigram_available() -> bool:
+    if context.is_offline_mode():
+        return True
+    query = sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    return bool(op.get_bind().scalar(query))
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES:
+        with op.get_context().autocommit_block():
+            op.create_index(name, 'products', columns, postgresql_concurrently=True, if_not_exists=True)
+
+    if not trigram_available():
+        context.config.print_stdout('pg_trgm is not available, ix_products_name_trgm is skipped')
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_products_name_trgm',
+            'products',
+            ['name'],
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_name_trgm', table_name='products', postgresql_concurrently=True, if_exists=True)
+    for name, _ in reversed(INDEXES):
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name='products', postgresql_concurrently=True, if_exists=True)
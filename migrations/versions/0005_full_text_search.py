@@ -0,0 +1,53 @@
+"""full-text search vectors of companies and products
+
+Adding stored generated column rewrites the table under ACCESS EXCLUSIVE
+lock, on big catalogs run it in maintenance window. GIN indexes are built
+concurrently afterwards.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:17:40.077000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0005'
+down_revision: str | None = '0004'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+TABLES = ['companies', 'products']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True))
+        )
+    for table in TABLES:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                f'ix_{table}_search_vector',
+                table,
+                ['search_vector'],
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.get_context().autocommit_block():
+            op.drop_index(f'ix_{table}_search_vector', table_name=table, postgresql_concurrently=True, if_exists=True)
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,64 @@
+"""hashed refresh tokens with rotation families
+
+Plain token column goes away together with its rows: tokens were
+never stored by the application, and any that were can't be hashed
+back into families. Table is small, so indexes are built in place.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:36:42.664000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0006'
+down_revision: str | None = '0005'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute('DELETE FROM refresh_tokens')
+    op.drop_index('ix_refresh_tokens_token', table_name='refresh_tokens', if_exists=True)
+    op.drop_column('refresh_tokens', 'token')
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=False))
+    op.add_column('refresh_tokens', sa.Column('user_id', sa.Integer(), nullable=False))
+    op.add_column('refresh_tokens', sa.Column('family', sa.String(length=32), nullable=False))
+    op.add_column('refresh_tokens', sa.Column('used_at', sa.DateTime(timezone=True), nullable=True))
+    op.alter_column(
+        'refresh_tokens',
+        'expires_at',
+        type_=sa.DateTime(timezone=True),
+        existing_type=sa.DateTime(),
+        nullable=False
+    )
+    op.create_foreign_key(
+        'refresh_tokens_user_id_fkey', 'refresh_tokens', 'user', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index('ix_refresh_tokens_token_hash', 'refresh_tokens', ['token_hash'], unique=True)
+    op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+    op.create_index('ix_refresh_tokens_family', 'refresh_tokens', ['family'])
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM refresh_tokens')
+    op.drop_index('ix_refresh_tokens_family', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_user_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_token_hash', table_name='refresh_tokens')
+    op.drop_constraint('refresh_tokens_user_id_fkey', 'refresh_tokens', type_='foreignkey')
+    op.alter_column(
+        'refresh_tokens',
+        'expires_at',
+        type_=sa.DateTime(),
+        existing_type=sa.DateTime(timezone=True),
+        nullable=True
+    )
+    op.drop_column('refresh_tokens', 'used_at')
+    op.drop_column('refresh_tokens', 'family')
+    op.drop_column('refresh_tokens', 'user_id')
+    op.drop_column('refresh_tokens', 'token_hash')
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(), nullable=True))
+    op.create_index('ix_refresh_tokens_token', 'refresh_tokens', ['token'])
@@ -0,0 +1,31 @@
+"""index for keyset pagination of companies by name
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:03:42.322000
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = '0007'
+down_revision: str | None = '0006'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_companies_name_id',
+            'companies',
+            ['name', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_companies_name_id', table_name='companies', postgresql_concurrently=True, if_exists=True)
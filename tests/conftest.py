@@ -1,37 +1,58 @@
+import asyncio
 from datetime import datetime, timedelta
 
 import pytest
 from fastapi.testclient import TestClient
 from passlib.context import CryptContext
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
-from app.config.core import database_url
-from app.config.database import Base, get_db
+from app.config.core import async_database_url, database_url
+from app.config.database import Base, ThreadedSession, get_db
 from app.main import app
 from app.models.company import Company
 from app.models.product import Product
 from app.models.user import User
-from app.routers.auth import create_token
+from app.routers.auth import create_token, revoked_families, revoked_users, user_cache
+from app.services.cache import cache, compressed_cache
+from app.services.metrics import instrument_engine
 
 hash_password = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
-engine = create_engine(database_url)
+engine = instrument_engine(create_engine(database_url))
 
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
-def override_get_db():
-    db = TestingSessionLocal()
+async def override_get_db():
+    db = ThreadedSession(TestingSessionLocal)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
 
+# every TestClient request runs in its own event loop, asyncpg connections can't outlive it
+async_engine = create_async_engine(async_database_url, poolclass=NullPool)
+instrument_engine(async_engine.sync_engine)
+
+AsyncTestingSessionLocal = async_sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=async_engine
+)
+
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
 
 current_datetime = datetime.now()
 current_microseconds = current_datetime.microsecond
@@ -41,12 +62,54 @@ current_microseconds = current_datetime.microsecond
 def api_client():
     try:
         Base.metadata.create_all(bind=engine)
+        asyncio.run(cache.clear())
+        asyncio.run(compressed_cache.clear())
+        asyncio.run(user_cache.clear())
+        revoked_users.clear()
+        revoked_families.clear()
         client = TestClient(app)
         yield client
     finally:
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def async_database():
+    app.dependency_overrides[get_db] = override_get_async_db
+    try:
+        yield
+    finally:
+        app.dependency_overrides[get_db] = override_get_db
+
+
+@pytest.fixture
+def query_counter():
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+
+
+@pytest.fixture
+def checkout_counter():
+    checkouts = []
+
+    def count_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    event.listen(engine, 'checkout', count_checkout)
+    try:
+        yield checkouts
+    finally:
+        event.remove(engine, 'checkout', count_checkout)
+
+
 @pytest.fixture
 def create_user():
     def _create_user(
@@ -73,6 +136,11 @@ def create_user():
 def authenticated_api_client(create_user):
     try:
         Base.metadata.create_all(bind=engine)
+        asyncio.run(cache.clear())
+        asyncio.run(compressed_cache.clear())
+        asyncio.run(user_cache.clear())
+        revoked_users.clear()
+        revoked_families.clear()
         user = create_user()
         token = create_token(
             username=user.username,
@@ -0,0 +1,133 @@
+from app.routers.company import create_company, get_companies, patch_company
+from app.routers.product import (
+    bulk_upsert_products,
+    create_product,
+    delete_product,
+    get_product,
+    get_products,
+)
+from app.utils.pathfinder import reverse
+
+
+def test_get_company_list_api_with_async_session(
+    async_database,
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(15)
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'count': 'estimate'})
+    # then
+    assert response.status_code == 200
+    assert response.json()['count'] == 15
+    assert len(response.json()['results']) == 10
+
+
+def test_post_and_patch_company_api_with_async_session(
+    async_database,
+    authenticated_api_client,
+    company_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    post_data = company_create_data_dict
+    # when
+    create_response = client.post(reverse(create_company), json=post_data)
+    company_id = create_response.json()['id']
+    url = reverse(patch_company, company_id=company_id)
+    patch_response = client.patch(url, json={'name': 'patchedCompanyName'})
+    # then
+    assert create_response.status_code == 201
+    assert patch_response.status_code == 200
+    assert patch_response.json()['name'] == 'patchedCompanyName'
+    assert patch_response.json()['description'] == post_data['description']
+
+
+def test_product_lifecycle_api_with_async_session(
+    async_database,
+    authenticated_api_client,
+    create_company,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    post_data = product_create_data_dict(company.id)
+    # when
+    create_response = client.post(reverse(create_product, company_id=company.id), json=post_data)
+    product_id = create_response.json()['id']
+    list_response = client.get(reverse(get_products, company_id=company.id))
+    delete_response = client.delete(reverse(delete_product, company_id=company.id, product_id=product_id))
+    get_response = client.get(reverse(get_product, company_id=company.id, product_id=product_id))
+    # then
+    assert create_response.status_code == 201
+    assert list_response.json()['count'] == 1
+    assert list_response.json()['results'][0]['price'] == post_data['price']
+    assert delete_response.status_code == 200
+    assert get_response.status_code == 404
+    assert get_response.json()['detail'] == 'Product not found'
+
+
+def test_bulk_upsert_products_api_with_async_session(
+    async_database,
+    authenticated_api_client,
+    create_company,
+    create_product,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    rows = [product_create_data_dict(company.id) for _ in range(3)]
+    rows.append({**product_create_data_dict(company.id), 'id': product.id, 'quantity': 99})
+    # when
+    url = reverse(bulk_upsert_products, company_id=company.id)
+    response = client.post(url, json=rows)
+    # then
+    assert response.status_code == 200
+    assert [row['status'] for row in response.json()['results']] == ['created'] * 3 + ['updated']
+    assert len({row['id'] for row in response.json()['results']}) == 4
+    updated = client.get(reverse(get_product, company_id=company.id, product_id=product.id))
+    assert updated.json()['quantity'] == 99
+
+
+def test_get_products_list_sorted_by_price_with_async_session(
+    async_database,
+    authenticated_api_client,
+    create_company,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    prices = ['9.99', '1.50', '4.25']
+    rows = [{**product_create_data_dict(company.id), 'price': price} for price in prices]
+    client.post(reverse(bulk_upsert_products, company_id=company.id), json=rows)
+    url = reverse(get_products, company_id=company.id)
+    # when
+    first_page = client.get(url, params={'order_by': 'price', 'pagination': 'cursor', 'limit': 2, 'price__gte': '1'})
+    second_page = client.get('/api' + first_page.json()['next_page'])
+    # then
+    assert [row['price'] for row in first_page.json()['results']] == ['1.50', '4.25']
+    assert [row['price'] for row in second_page.json()['results']] == ['9.99']
+
+
+def test_get_company_list_api_with_products_with_async_session(
+    async_database,
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    create_num_of_products_for_one_company(3)
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'include': 'products', 'products_limit': 2, 'fields': 'name'})
+    # then
+    assert response.status_code == 200
+    assert len(response.json()['results'][0]['products']) == 2
+    assert set(response.json()['results'][0]) == {'id', 'name', 'products'}
@@ -0,0 +1,315 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from fakeredis import FakeAsyncRedis, FakeRedis, FakeServer
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app import main as app_main
+from app.config.database import ThreadedSession
+from app.models.user import RefreshTokens, User
+from app.routers import auth as auth_router
+from app.routers.auth import (
+    delete_expired_refresh_tokens,
+    obtain_token,
+    refresh_token,
+    register,
+    revoke_user_tokens,
+)
+from app.routers.company import create_company
+from app.services.cache import RedisCache
+from app.services.security import hash_token, password_hasher
+from app.utils.pathfinder import reverse
+from tests.conftest import TestingSessionLocal
+
+
+def test_post_company_create_api_in_stateless_auth_mode_skips_user_lookup(
+    monkeypatch,
+    authenticated_api_client,
+    company_create_data_dict,
+    query_counter
+):
+    # given
+    monkeypatch.setattr('app.routers.auth.AUTH_STATELESS', True)
+    client = authenticated_api_client
+    query_counter.clear()
+    # when
+    url = reverse(create_company)
+    response = client.post(url, json=company_create_data_dict)
+    # then
+    assert response.status_code == 201
+    assert not any('FROM "user"' in statement for statement in query_counter)
+
+
+def test_post_company_create_api_reuses_cached_user(
+    authenticated_api_client,
+    company_create_data_dict,
+    query_counter
+):
+    # given
+    client = authenticated_api_client
+    url = reverse(create_company)
+    client.post(url, json=company_create_data_dict)
+    query_counter.clear()
+    # when
+    response = client.post(url, json=company_create_data_dict)
+    # then
+    assert response.status_code == 201
+    assert not any('FROM "user"' in statement for statement in query_counter)
+
+
+def test_post_company_create_api_with_revoked_token(
+    monkeypatch,
+    authenticated_api_client,
+    company_create_data_dict
+):
+    # given
+    monkeypatch.setattr('app.routers.auth.AUTH_STATELESS', True)
+    client = authenticated_api_client
+    asyncio.run(revoke_user_tokens(1))
+    # when
+    url = reverse(create_company)
+    response = client.post(url, json=company_create_data_dict)
+    # then
+    assert response.status_code == 401
+    assert response.json()['detail'] == 'Could not validate user.'
+
+
+def test_post_company_create_api_with_token_revoked_by_other_worker(
+    monkeypatch,
+    authenticated_api_client,
+    company_create_data_dict
+):
+    # given
+    monkeypatch.setattr('app.routers.auth.AUTH_STATELESS', True)
+    server = FakeServer()
+    shared_revocations = RedisCache(FakeAsyncRedis(server=server), ttl=3600, namespace='revoked:')
+    monkeypatch.setattr('app.routers.auth.shared_revocations', shared_revocations)
+    client = authenticated_api_client
+    # other worker writes to the same server, revocations of this process stay empty
+    FakeRedis(server=server).set('revoked:user:1', json.dumps(datetime.now(timezone.utc).timestamp()))
+    # when
+    url = reverse(create_company)
+    response = client.post(url, json=company_create_data_dict)
+    # then
+    assert auth_router.revoked_users == {}
+    assert response.status_code == 401
+    assert response.json()['detail'] == 'Could not validate user.'
+
+
+def test_post_company_create_api_with_invalid_token(
+    api_client,
+    company_create_data_dict
+):
+    # given
+    client = api_client
+    # when
+    url = reverse(create_company)
+    response = client.post(
+        url,
+        json=company_create_data_dict,
+        headers={'Authorization': 'Bearer not.a.token'}
+    )
+    # then
+    assert response.status_code == 401
+    assert response.json()['detail'] == 'Could not validate user.'
+
+
+def test_register_and_obtain_token_api(
+    monkeypatch,
+    api_client
+):
+    # given
+    monkeypatch.setattr(password_hasher, 'context', CryptContext(schemes=['bcrypt'], bcrypt__rounds=4))
+    client = api_client
+    credentials = {'username': 'new.user', 'password': 'superStrongPassword123'}
+    # when
+    register_response = client.post(reverse(register), json=credentials)
+    token_response = client.post(reverse(obtain_token), json=credentials)
+    wrong_response = client.post(reverse(obtain_token), json={**credentials, 'password': 'wrong'})
+    # then
+    assert register_response.status_code == 201
+    assert token_response.status_code == 200
+    assert token_response.json()['token_type'] == 'bearer'
+    assert wrong_response.status_code == 401
+
+
+def test_obtain_token_api_upgrades_outdated_password_hash(
+    monkeypatch,
+    api_client,
+    create_user
+):
+    # given
+    old_hash = CryptContext(schemes=['bcrypt'], bcrypt__rounds=4).hash('superStrongPassword123')
+    user = create_user(password=old_hash)
+    monkeypatch.setattr(password_hasher, 'context', CryptContext(schemes=['bcrypt'], bcrypt__rounds=5))
+    client = api_client
+    # when
+    response = client.post(
+        reverse(obtain_token),
+        json={'username': user.username, 'password': 'superStrongPassword123'}
+    )
+    # then
+    session = TestingSessionLocal()
+    stored_hash = session.get(User, user.id).hashed_password
+    session.close()
+    assert response.status_code == 200
+    assert stored_hash != old_hash
+    assert stored_hash.startswith('$2b$05$')
+
+
+def test_register_api_when_password_workers_are_saturated(
+    monkeypatch,
+    api_client
+):
+    # given
+    monkeypatch.setattr(password_hasher, 'max_pending', 0)
+    client = api_client
+    # when
+    response = client.post(
+        reverse(register),
+        json={'username': 'new.user', 'password': 'superStrongPassword123'}
+    )
+    # then
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+
+
+def obtain_tokens(client, monkeypatch) -> dict:
+    monkeypatch.setattr(password_hasher, 'context', CryptContext(schemes=['bcrypt'], bcrypt__rounds=4))
+    credentials = {'username': 'refresh.user', 'password': 'superStrongPassword123'}
+    client.post(reverse(register), json=credentials)
+    return client.post(reverse(obtain_token), json=credentials).json()
+
+
+def test_refresh_token_api_rotates_tokens(
+    monkeypatch,
+    api_client,
+    company_create_data_dict
+):
+    # given
+    client = api_client
+    tokens = obtain_tokens(client, monkeypatch)
+    # when
+    response = client.post(reverse(refresh_token), json={'refresh_token': tokens['refresh_token']})
+    # then
+    session = TestingSessionLocal()
+    stored = session.scalars(select(RefreshTokens).order_by(RefreshTokens.id)).all()
+    session.close()
+    assert response.status_code == 200
+    assert response.json()['refresh_token'] != tokens['refresh_token']
+    assert [row.token_hash for row in stored] == [
+        hash_token(tokens['refresh_token']),
+        hash_token(response.json()['refresh_token'])
+    ]
+    assert stored[0].used_at is not None and stored[1].used_at is None
+    assert stored[0].family == stored[1].family
+    new_access = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+    assert client.post(reverse(create_company), json=company_create_data_dict, headers=new_access).status_code == 201
+
+
+def test_refresh_token_api_reuse_revokes_family(
+    monkeypatch,
+    api_client,
+    query_counter
+):
+    # given
+    client = api_client
+    tokens = obtain_tokens(client, monkeypatch)
+    rotated = client.post(reverse(refresh_token), json={'refresh_token': tokens['refresh_token']}).json()
+    # when
+    reused = client.post(reverse(refresh_token), json={'refresh_token': tokens['refresh_token']})
+    query_counter.clear()
+    successor = client.post(reverse(refresh_token), json={'refresh_token': rotated['refresh_token']})
+    successor_queries = list(query_counter)
+    # then
+    session = TestingSessionLocal()
+    remaining = session.scalars(select(RefreshTokens)).all()
+    session.close()
+    assert reused.status_code == 401
+    assert successor.status_code == 401
+    # revoked family is rejected from memory
+    assert successor_queries == []
+    assert remaining == []
+
+
+def test_refresh_and_access_tokens_are_not_interchangeable(
+    monkeypatch,
+    api_client,
+    company_create_data_dict
+):
+    # given
+    client = api_client
+    tokens = obtain_tokens(client, monkeypatch)
+    # when
+    as_access = client.post(
+        reverse(create_company),
+        json=company_create_data_dict,
+        headers={'Authorization': f'Bearer {tokens["refresh_token"]}'}
+    )
+    as_refresh = client.post(reverse(refresh_token), json={'refresh_token': tokens['access_token']})
+    # then
+    assert as_access.status_code == 401
+    assert as_refresh.status_code == 401
+
+
+def test_delete_expired_refresh_tokens_in_batches(
+    monkeypatch,
+    api_client,
+    create_user
+):
+    # given
+    monkeypatch.setattr(auth_router, 'REFRESH_SWEEP_BATCH', 2)
+    user = create_user()
+    now = datetime.now(timezone.utc)
+    session = TestingSessionLocal()
+    session.add_all([
+        RefreshTokens(token_hash=str(i), user_id=user.id, family='sweep', expires_at=now - timedelta(minutes=i + 1))
+        for i in range(5)
+    ])
+    session.add(RefreshTokens(token_hash='alive', user_id=user.id, family='sweep', expires_at=now + timedelta(days=1)))
+    session.commit()
+    auth_router.revoked_families['stale'] = int(now.timestamp()) - 1
+    db = ThreadedSession(TestingSessionLocal)
+
+    async def sweep() -> int:
+        try:
+            return await delete_expired_refresh_tokens(db)
+        finally:
+            await db.close()
+
+    # when
+    deleted = asyncio.run(sweep())
+    # then
+    remaining = session.scalars(select(RefreshTokens.token_hash)).all()
+    session.close()
+    assert deleted == 5
+    assert remaining == ['alive']
+    assert 'stale' not in auth_router.revoked_families
+
+
+def test_lifespan_waits_for_cancelled_sweeper(monkeypatch):
+    # given
+    events = []
+
+    async def sweep_refresh_tokens() -> None:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            # rollback of interrupted sweep takes a round trip
+            await asyncio.sleep(0)
+            events.append('sweeper stopped')
+            raise
+
+    monkeypatch.setattr(app_main, 'sweep_refresh_tokens', sweep_refresh_tokens)
+
+    async def run_application() -> None:
+        async with app_main.lifespan(app_main.app):
+            await asyncio.sleep(0)
+        events.append('lifespan exited')
+
+    # when
+    asyncio.run(run_application())
+    # then
+    assert events == ['sweeper stopped', 'lifespan exited']
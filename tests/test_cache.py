@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.routers.company import delete_company, get_company, put_company
+from app.routers.monitoring import cache_stats
+from app.routers.product import get_product
+from app.services.cache import CacheBackend, MemoryCache, RedisCache
+from app.utils.pathfinder import reverse
+
+
+def test_get_company_is_served_from_cache(
+    api_client,
+    create_company,
+    query_counter
+):
+    # given
+    client = api_client
+    company = create_company
+    url = reverse(get_company, company_id=company.id)
+    client.get(url)
+    query_counter.clear()
+    # when
+    response = client.get(url)
+    stats = client.get(reverse(cache_stats)).json()
+    # then
+    assert response.status_code == 200
+    assert response.json()['name'] == company.name
+    assert query_counter == []
+    assert stats['hits'] >= 1
+
+
+def test_put_company_invalidates_cached_company(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    url = reverse(get_company, company_id=company.id)
+    client.get(url)
+    # when
+    client.put(reverse(put_company, company_id=company.id), json={'name': 'putCompanyName'})
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert response.json()['name'] == 'putCompanyName'
+
+
+def test_delete_company_invalidates_cached_products(
+    authenticated_api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    url = reverse(get_product, company_id=company.id, product_id=product.id)
+    client.get(url)
+    # when
+    client.delete(reverse(delete_company, company_id=company.id))
+    response = client.get(url)
+    # then
+    assert response.status_code == 404
+    assert response.json()['detail'] == 'Company not found.'
+
+
+def test_memory_cache_evicts_least_recently_used_and_expired_entries():
+    # given
+    memory_cache = MemoryCache(max_size=2, ttl=0.05)
+
+    async def scenario():
+        await memory_cache.set('a', 1)
+        await memory_cache.set('b', 2)
+        await memory_cache.get('a')
+        await memory_cache.set('c', 3)
+        evicted = await memory_cache.get('b')
+        kept = await memory_cache.get('a')
+        time.sleep(0.06)
+        expired = await memory_cache.get('c')
+        return evicted, kept, expired
+
+    # when
+    evicted, kept, expired = asyncio.run(scenario())
+    # then
+    assert evicted is None
+    assert kept == 1
+    assert expired is None
+    assert memory_cache.stats()['hits'] == 2
+    assert memory_cache.stats()['misses'] == 2
+
+
+def test_redis_cache_deletes_keys_by_prefix():
+    # given
+    redis_cache = RedisCache(FakeAsyncRedis(), ttl=60)
+
+    async def scenario():
+        await redis_cache.set('product:1:1', {'name': 'first'})
+        await redis_cache.set('product:1:2', {'name': 'second'})
+        await redis_cache.set('product:2:1', {'name': 'other'})
+        await redis_cache.delete_prefix('product:1:')
+        return [
+            await redis_cache.get('product:1:1'),
+            await redis_cache.get('product:1:2'),
+            await redis_cache.get('product:2:1'),
+        ]
+
+    # when
+    result = asyncio.run(scenario())
+    # then
+    assert result == [None, None, {'name': 'other'}]
+
+
+def test_incomplete_cache_backend_fails_on_creation():
+    # given
+    class GetOnlyCache(CacheBackend):
+        async def _get(self, key):
+            return None
+    # then
+    with pytest.raises(TypeError):
+        GetOnlyCache()
@@ -1,3 +1,6 @@
+from sqlalchemy import update
+
+from app.models.company import Company
 from app.routers.company import (
     create_company,
     delete_company,
@@ -6,7 +9,9 @@ from app.routers.company import (
     patch_company,
     put_company,
 )
+from app.schemas.company import COMPANY_SUMMARY_FIELDS
 from app.utils.pathfinder import reverse
+from tests.conftest import TestingSessionLocal
 
 
 def test_get_company_list_api_with_empty_companies(
@@ -242,3 +247,258 @@ def test_delete_company_specific_api(
     # then
     assert response.status_code == 200
     assert response.json() == 'Company deleted.'
+
+
+def test_get_company_list_api_with_cursor_pagination(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    companies = create_num_of_companies(15)
+    # when
+    url = reverse(get_companies)
+    first_page = client.get(url, params={'pagination': 'cursor', 'order_by': 'name'})
+    token = first_page.json()['next_page'].split('after=')[1].split('&')[0]
+    second_page = client.get(url, params={'after': token})
+    # then
+    assert first_page.status_code == 200
+    assert second_page.status_code == 200
+    assert len(first_page.json()['results']) == 10
+    assert len(second_page.json()['results']) == 5
+    assert second_page.json()['next_page'] is None
+    received_ids = [
+        company['id']
+        for company in first_page.json()['results'] + second_page.json()['results']
+    ]
+    assert received_ids == [company.id for company in companies]
+
+
+def test_get_company_list_api_with_name_cursor_reaches_null_names(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    companies = create_num_of_companies(5)
+    unnamed = [companies[1].id, companies[3].id]
+    session = TestingSessionLocal()
+    session.execute(update(Company).where(Company.id.in_(unnamed)).values(name=None))
+    session.commit()
+    session.close()
+    # when
+    url = reverse(get_companies)
+    pages, response = [], client.get(url, params={'pagination': 'cursor', 'order_by': 'name', 'limit': 2})
+    while True:
+        pages.append([row['id'] for row in response.json()['results']])
+        if response.json()['next_page'] is None:
+            break
+        token = response.json()['next_page'].split('after=')[1].split('&')[0]
+        response = client.get(url, params={'after': token, 'limit': 2})
+    # then
+    named = [company.id for company in companies if company.id not in unnamed]
+    assert pages == [named[:2], [named[2], unnamed[0]], [unnamed[1]]]
+
+
+def test_get_company_list_api_with_invalid_cursor(
+    api_client
+):
+    # given
+    client = api_client
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'after': 'not-a-cursor'})
+    # then
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor.'
+
+
+def test_get_company_list_api_fetches_page_and_count_in_one_query(
+    api_client,
+    create_num_of_companies,
+    query_counter
+):
+    # given
+    client = api_client
+    create_num_of_companies(20)
+    query_counter.clear()
+    # when
+    url = reverse(get_companies)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert response.json()['count'] == 20
+    assert len(query_counter) == 1
+
+
+def test_get_company_list_api_past_last_page_keeps_count(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(5)
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'skip': 10})
+    # then
+    assert response.status_code == 200
+    assert response.json()['results'] == []
+    assert response.json()['count'] == 5
+    assert response.json()['next_page'] is None
+
+
+def test_get_company_list_api_without_count(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(15)
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'count': 'none'})
+    # then
+    assert response.status_code == 200
+    assert response.json()['count'] is None
+    assert response.json()['next_page'] is not None
+    assert len(response.json()['results']) == 10
+
+
+def test_get_company_list_api_with_summary_projection(
+    api_client,
+    create_num_of_companies,
+    query_counter
+):
+    # given
+    client = api_client
+    create_num_of_companies(3)
+    query_counter.clear()
+    # when
+    url = reverse(get_companies)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert tuple(response.json()['results'][0]) == COMPANY_SUMMARY_FIELDS
+    assert 'social_media1' not in query_counter[0]
+    assert 'description' not in query_counter[0]
+
+
+def test_get_company_list_api_with_sparse_fields(
+    api_client,
+    create_num_of_companies,
+    query_counter
+):
+    # given
+    client = api_client
+    create_num_of_companies(3)
+    query_counter.clear()
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'fields': 'name,email', 'limit': 2})
+    # then
+    assert response.status_code == 200
+    assert set(response.json()['results'][0]) == {'id', 'name', 'email'}
+    assert 'phone_number' not in query_counter[0]
+    assert 'fields=name%2Cemail' in response.json()['next_page']
+    # when
+    response = client.get('/api' + response.json()['next_page'])
+    # then
+    assert set(response.json()['results'][0]) == {'id', 'name', 'email'}
+
+
+def test_get_company_list_api_with_unknown_field(
+    api_client
+):
+    # given
+    client = api_client
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'fields': 'name,password'})
+    # then
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Unknown fields: password.'
+
+
+def test_get_specific_company_with_sparse_fields(
+    api_client,
+    create_company
+):
+    # given
+    client = api_client
+    company = create_company
+    # when
+    url = reverse(get_company, company_id=company.id)
+    response = client.get(url, params={'fields': 'name'})
+    # then
+    assert response.status_code == 200
+    assert response.json() == {'id': company.id, 'name': company.name}
+    assert response.headers['etag'] == f'"{company.version}"'
+
+
+def test_get_company_list_api_with_products_in_fixed_number_of_queries(
+    api_client,
+    create_num_of_companies,
+    create_product,
+    query_counter
+):
+    # given
+    client = api_client
+    companies = create_num_of_companies(6)
+    for company in companies:
+        for _ in range(3):
+            create_product(company.id)
+    url = reverse(get_companies)
+    statements = []
+    # when
+    for limit in (2, 6):
+        query_counter.clear()
+        response = client.get(url, params={'include': 'products', 'products_limit': 2, 'limit': limit})
+        statements.append(len(query_counter))
+        # then
+        assert response.status_code == 200
+        assert len(response.json()['results']) == limit
+        assert all(len(item['products']) == 2 for item in response.json()['results'])
+    assert statements == [2, 2]
+    assert response.json()['results'][0]['products'][0]['company_id'] == companies[0].id
+
+
+def test_get_company_list_api_include_products_is_kept_in_links(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(3)
+    # when
+    url = reverse(get_companies)
+    response = client.get(url, params={'include': 'products', 'limit': 2})
+    response = client.get('/api' + response.json()['next_page'])
+    # then
+    assert response.status_code == 200
+    assert response.json()['results'][0]['products'] == []
+
+
+def test_get_specific_company_with_products(
+    api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = api_client
+    company = create_company
+    product = create_product(company.id)
+    url = reverse(get_company, company_id=company.id)
+    # when
+    response = client.get(url, params={'include': 'products'})
+    etag = response.headers['etag']
+    # then
+    assert response.status_code == 200
+    assert response.json()['products'][0]['id'] == product.id
+    assert etag.startswith('W/')
+    # when
+    create_product(company.id)
+    response = client.get(url, params={'include': 'products'}, headers={'If-None-Match': etag})
+    # then
+    assert response.status_code == 200
+    assert len(response.json()['products']) == 2
@@ -0,0 +1,192 @@
+import gzip
+import json
+
+import brotli
+import zstandard
+
+from app.routers.company import get_companies, get_company, patch_company
+from app.routers.product import export_products
+from app.services.cache import compressed_cache
+from app.utils.compression import negotiate_coding
+from app.utils.pathfinder import reverse
+
+
+def test_negotiate_coding_follows_q_values_and_server_preference():
+    available = ('br', 'gzip')
+    assert negotiate_coding('gzip, br', available) == 'br'
+    assert negotiate_coding('br;q=0.5, gzip', available) == 'gzip'
+    assert negotiate_coding('gzip;q=0, identity', available) is None
+    assert negotiate_coding('*', available) == 'br'
+    assert negotiate_coding('*, br;q=0', available) == 'gzip'
+    assert negotiate_coding('', available) is None
+
+
+def decompress(coding: str, raw: bytes) -> bytes:
+    if coding == 'br':
+        return brotli.decompress(raw)
+    # streamed zstd frames carry no content size, one-shot decompress needs it
+    return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+
+
+def test_get_company_list_round_trips_brotli_and_zstd(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(10)
+    url = reverse(get_companies)
+    identity = client.get(url, params={'fields': 'all'}, headers={'Accept-Encoding': 'identity'})
+    # when
+    bodies = {}
+    for coding in ('br', 'zstd'):
+        with client.stream('GET', url, params={'fields': 'all'}, headers={'Accept-Encoding': coding}) as response:
+            bodies[coding] = response.headers, b''.join(response.iter_raw())
+    # then
+    for coding, (headers, raw) in bodies.items():
+        assert headers['content-encoding'] == coding
+        assert int(headers['content-length']) == len(raw) < len(identity.content)
+        assert json.loads(decompress(coding, raw)) == identity.json()
+
+
+def test_get_company_list_is_compressed_above_minimum_size(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(10)
+    url = reverse(get_companies)
+    # when
+    compressed = client.get(url, params={'fields': 'all'}, headers={'Accept-Encoding': 'gzip'})
+    identity = client.get(url, params={'fields': 'all'}, headers={'Accept-Encoding': 'identity'})
+    # then
+    assert compressed.headers['content-encoding'] == 'gzip'
+    assert compressed.headers['vary'] == 'Accept-Encoding'
+    assert int(compressed.headers['content-length']) < len(identity.content)
+    assert 'content-encoding' not in identity.headers
+    assert identity.headers['vary'] == 'Accept-Encoding'
+    assert compressed.json() == identity.json()
+    # weak page validator names both representations
+    assert compressed.headers['etag'] == identity.headers['etag']
+
+
+def test_small_response_is_not_compressed(
+    api_client
+):
+    # given
+    client = api_client
+    # when
+    response = client.get(reverse(get_companies), headers={'Accept-Encoding': 'gzip'})
+    # then
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+
+
+def test_compressed_company_keeps_conditional_requests_working(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    url = reverse(get_company, company_id=company.id)
+    client.patch(
+        reverse(patch_company, company_id=company.id),
+        json={'description': 'long description ' * 50}
+    )
+    # when
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['etag']
+    revalidated = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    updated = client.patch(
+        reverse(patch_company, company_id=company.id),
+        json={'name': 'renamed'},
+        headers={'If-Match': etag}
+    )
+    # then
+    assert response.headers['content-encoding'] == 'gzip'
+    assert etag == '"2-gzip"'
+    assert revalidated.status_code == 304
+    assert revalidated.headers['etag'] == etag
+    assert updated.status_code == 200
+
+
+def test_brotli_and_zstd_company_etags_name_their_coding(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    url = reverse(get_company, company_id=company.id)
+    client.patch(
+        reverse(patch_company, company_id=company.id),
+        json={'description': 'long description ' * 50}
+    )
+    # when
+    etags, revalidated = {}, {}
+    for coding in ('br', 'zstd'):
+        etags[coding] = client.get(url, headers={'Accept-Encoding': coding}).headers['etag']
+        revalidated[coding] = client.get(url, headers={'Accept-Encoding': coding, 'If-None-Match': etags[coding]})
+    # then
+    assert etags == {'br': '"2-br"', 'zstd': '"2-zstd"'}
+    for coding, response in revalidated.items():
+        assert response.status_code == 304
+        assert response.headers['etag'] == etags[coding]
+
+
+def test_compressed_body_is_cached_by_validator(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(10)
+    url = reverse(get_companies)
+    hits = compressed_cache.hits
+    # when
+    first = client.get(url, params={'fields': 'all'}, headers={'Accept-Encoding': 'gzip'})
+    second = client.get(url, params={'fields': 'all'}, headers={'Accept-Encoding': 'gzip'})
+    # then
+    assert compressed_cache.hits == hits + 1
+    assert first.content == second.content
+
+
+def test_export_stream_is_compressed(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(20)
+    url = reverse(export_products, company_id=products[0].company_id)
+    # when
+    with client.stream('GET', url, headers={'Accept-Encoding': 'gzip'}) as response:
+        raw = b''.join(response.iter_raw())
+    # then
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in response.headers
+    rows = [json.loads(line) for line in gzip.decompress(raw).splitlines()]
+    assert [row['id'] for row in rows] == [product.id for product in products]
+
+
+def test_export_stream_round_trips_brotli_and_zstd(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(20)
+    url = reverse(export_products, company_id=products[0].company_id)
+    # when
+    bodies = {}
+    for coding in ('br', 'zstd'):
+        with client.stream('GET', url, headers={'Accept-Encoding': coding}) as response:
+            bodies[coding] = response.headers, b''.join(response.iter_raw())
+    # then
+    for coding, (headers, raw) in bodies.items():
+        assert headers['content-encoding'] == coding
+        assert 'content-length' not in headers
+        rows = [json.loads(line) for line in decompress(coding, raw).splitlines()]
+        assert [row['id'] for row in rows] == [product.id for product in products]
@@ -0,0 +1,168 @@
+from app.routers.company import (
+    delete_company,
+    get_companies,
+    get_company,
+    patch_company,
+    put_company,
+)
+from app.routers.product import delete_product, get_product, patch_product
+from app.utils.pathfinder import reverse
+
+
+def test_get_company_returns_not_modified_for_matching_etag(
+    api_client,
+    create_company,
+    query_counter
+):
+    # given
+    client = api_client
+    company = create_company
+    url = reverse(get_company, company_id=company.id)
+    first_response = client.get(url)
+    etag = first_response.headers['ETag']
+    query_counter.clear()
+    # when
+    response = client.get(url, headers={'If-None-Match': etag})
+    # then
+    assert first_response.headers['Last-Modified']
+    assert etag == f'"{company.version}"'
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['ETag'] == etag
+    assert query_counter == []
+
+
+def test_patch_company_changes_etag(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    url = reverse(get_company, company_id=company.id)
+    etag = client.get(url).headers['ETag']
+    client.patch(reverse(patch_company, company_id=company.id), json={'name': 'patchedCompanyName'})
+    # when
+    response = client.get(url, headers={'If-None-Match': etag})
+    # then
+    assert response.status_code == 200
+    assert response.json()['name'] == 'patchedCompanyName'
+    assert response.headers['ETag'] != etag
+
+
+def test_get_product_returns_not_modified_since_last_modified(
+    api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = api_client
+    company = create_company
+    product = create_product(company.id)
+    url = reverse(get_product, company_id=company.id, product_id=product.id)
+    last_modified = client.get(url).headers['Last-Modified']
+    # when
+    response = client.get(url, headers={'If-Modified-Since': last_modified})
+    # then
+    assert response.status_code == 304
+
+
+def test_get_company_list_etag_changes_with_new_company(
+    api_client,
+    create_num_of_companies
+):
+    # given
+    client = api_client
+    create_num_of_companies(3)
+    url = reverse(get_companies)
+    etag = client.get(url).headers['ETag']
+    # when
+    not_modified_response = client.get(url, headers={'If-None-Match': etag})
+    create_num_of_companies(1)
+    modified_response = client.get(url, headers={'If-None-Match': etag})
+    # then
+    assert not_modified_response.status_code == 304
+    assert modified_response.status_code == 200
+    assert modified_response.json()['count'] == 4
+
+
+def test_patch_product_with_stale_if_match_is_rejected(
+    authenticated_api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    url = reverse(patch_product, company_id=company.id, product_id=product.id)
+    etag = client.get(reverse(get_product, company_id=company.id, product_id=product.id)).headers['ETag']
+    # when
+    first_writer = client.patch(url, json={'quantity': 1}, headers={'If-Match': etag})
+    second_writer = client.patch(url, json={'quantity': 2}, headers={'If-Match': etag})
+    current = client.get(reverse(get_product, company_id=company.id, product_id=product.id))
+    # then
+    assert first_writer.status_code == 200
+    assert first_writer.headers['ETag'] == '"2"'
+    assert first_writer.json()['version'] == 2
+    assert second_writer.status_code == 412
+    assert current.json()['quantity'] == 1
+    assert current.headers['ETag'] == first_writer.headers['ETag']
+
+
+def test_put_company_if_match_rejects_weak_tag_and_reports_missing_company(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    # when
+    weak_tag = client.put(
+        reverse(put_company, company_id=company.id),
+        json={'name': 'putCompanyName'},
+        headers={'If-Match': f'W/"{company.version}"'}
+    )
+    missing = client.put(
+        reverse(put_company, company_id=company.id + 1),
+        json={'name': 'putCompanyName'},
+        headers={'If-Match': '"1"'}
+    )
+    any_version = client.put(
+        reverse(put_company, company_id=company.id),
+        json={'name': 'putCompanyName'},
+        headers={'If-Match': '*'}
+    )
+    # then
+    assert weak_tag.status_code == 412
+    assert missing.status_code == 404
+    assert any_version.status_code == 200
+    assert any_version.json()['version'] == company.version + 1
+
+
+def test_delete_with_if_match(
+    authenticated_api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    # when
+    stale_product = client.delete(
+        reverse(delete_product, company_id=company.id, product_id=product.id),
+        headers={'If-Match': f'"{product.version + 1}"'}
+    )
+    stale_company = client.delete(
+        reverse(delete_company, company_id=company.id),
+        headers={'If-Match': '"7", "8"'}
+    )
+    current_company = client.delete(
+        reverse(delete_company, company_id=company.id),
+        headers={'If-Match': f'"7", "{company.version}"'}
+    )
+    # then
+    assert stale_product.status_code == 412
+    assert stale_company.status_code == 412
+    assert current_company.status_code == 200
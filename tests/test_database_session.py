@@ -0,0 +1,86 @@
+import subprocess
+import sys
+
+from app.routers.company import create_company, get_companies
+from app.routers.monitoring import pool_stats
+from app.routers.product import get_product
+from app.utils.pathfinder import reverse
+
+
+def test_non_database_endpoints_do_not_check_out_connection(
+    api_client,
+    checkout_counter
+):
+    # given
+    client = api_client
+    # when
+    docs_response = client.get('/docs')
+    openapi_response = client.get('/openapi.json')
+    stats_response = client.get(reverse(pool_stats))
+    # then
+    assert docs_response.status_code == 200
+    assert openapi_response.status_code == 200
+    assert stats_response.status_code == 200
+    assert len(checkout_counter) == 0
+
+
+def test_get_company_list_checks_out_one_connection(
+    api_client,
+    create_num_of_companies,
+    checkout_counter
+):
+    # given
+    client = api_client
+    create_num_of_companies(3)
+    checkout_counter.clear()
+    # when
+    response = client.get(reverse(get_companies))
+    # then
+    assert response.status_code == 200
+    assert len(checkout_counter) == 1
+
+
+def test_get_product_checks_out_one_connection(
+    api_client,
+    create_company,
+    create_product,
+    checkout_counter
+):
+    # given
+    client = api_client
+    company = create_company
+    product = create_product(company.id)
+    checkout_counter.clear()
+    # when
+    url = reverse(get_product, company_id=company.id, product_id=product.id)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert len(checkout_counter) == 1
+
+
+def test_authenticated_company_create_checks_out_one_connection(
+    authenticated_api_client,
+    company_create_data_dict,
+    checkout_counter
+):
+    # given
+    client = authenticated_api_client
+    checkout_counter.clear()
+    # when
+    response = client.post(reverse(create_company), json=company_create_data_dict)
+    # then
+    assert response.status_code == 201
+    assert len(checkout_counter) == 1
+
+
+def test_importing_app_neither_connects_nor_loads_driver():
+    # given
+    script = (
+        'import sys; import app.main; from app.config.database import get_engine; '
+        'print(get_engine.cache_info().currsize, "psycopg2" in sys.modules, "asyncpg" in sys.modules)'
+    )
+    # when
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    # then
+    assert output.stdout.split() == ['0', 'False', 'False']
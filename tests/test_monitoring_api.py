@@ -0,0 +1,117 @@
+from passlib.context import CryptContext
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.config.core import DB_POOL_SIZE, PRODUCT_LINK, database_url
+from app.config.database import TimedQueuePool
+from app.routers.auth import register
+from app.routers.monitoring import metrics, pool_stats
+from app.routers.product import get_product
+from app.services.security import password_hasher
+from app.utils.pathfinder import reverse
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_get_pool_stats_api(
+    api_client
+):
+    # given
+    client = api_client
+    # when
+    url = reverse(pool_stats)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert response.json()['size'] == DB_POOL_SIZE
+    assert response.json()['checked_out'] >= 0
+    assert response.json()['checkout_wait_max'] >= 0
+
+
+def test_timed_pool_records_checkouts():
+    # given
+    engine = create_engine(database_url, poolclass=TimedQueuePool, pool_size=1)
+    observed = sample('db_pool_checkout_duration_seconds_count')
+    # when
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    # then
+    assert engine.pool.checkouts == 3
+    assert engine.pool.checkout_wait_total >= engine.pool.checkout_wait_max > 0
+    assert sample('db_pool_checkout_duration_seconds_count') == observed + 3
+    engine.dispose()
+
+
+def test_metrics_api_labels_requests_by_route_template(
+    api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = api_client
+    product = create_product(create_company.id)
+    client.get(reverse(get_product, company_id=product.company_id, product_id=product.id))
+    # when
+    response = client.get(reverse(metrics))
+    # then
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert f'route="{PRODUCT_LINK}",status="200"' in response.text
+    assert f'/products/{product.id}"' not in response.text
+
+
+def test_metrics_count_queries_of_each_request(
+    api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = api_client
+    product = create_product(create_company.id)
+    labels = {'method': 'GET', 'route': PRODUCT_LINK}
+    requests = sample('db_request_queries_count', **labels)
+    queries = sample('db_request_queries_sum', **labels)
+    # when
+    response = client.get(reverse(get_product, company_id=product.company_id, product_id=product.id))
+    # then
+    assert response.status_code == 200
+    assert sample('db_request_queries_count', **labels) == requests + 1
+    assert sample('db_request_queries_sum', **labels) > queries
+    assert sample('db_request_duration_seconds_sum', **labels) > 0
+    assert sample('http_requests_in_progress', method='GET') == 0
+
+
+def test_metrics_count_queries_of_each_request_with_async_session(
+    async_database,
+    api_client,
+    create_company,
+    create_product
+):
+    # given
+    client = api_client
+    product = create_product(create_company.id)
+    labels = {'method': 'GET', 'route': PRODUCT_LINK}
+    queries = sample('db_request_queries_sum', **labels)
+    # when
+    response = client.get(reverse(get_product, company_id=product.company_id, product_id=product.id))
+    # then
+    assert response.status_code == 200
+    assert sample('db_request_queries_sum', **labels) > queries
+
+
+def test_metrics_time_password_hashing(
+    monkeypatch,
+    api_client
+):
+    # given
+    monkeypatch.setattr(password_hasher, 'context', CryptContext(schemes=['bcrypt'], bcrypt__rounds=4))
+    client = api_client
+    hashed = sample('password_hash_duration_seconds_count', operation='hash')
+    # when
+    response = client.post(reverse(register), json={'username': 'metrics.user', 'password': 'superStrongPassword123'})
+    # then
+    assert response.status_code == 201
+    assert sample('password_hash_duration_seconds_count', operation='hash') == hashed + 1
@@ -1,11 +1,18 @@
+import csv
+import io
+import json
+
 from app.routers.product import (
+    bulk_upsert_products,
     create_product,
     delete_product,
+    export_products,
     get_product,
     get_products,
     patch_product,
     put_product,
 )
+from app.schemas.product import PRODUCT_SUMMARY_FIELDS, ProductPaginated
 from app.utils.pathfinder import reverse
 
 
@@ -35,7 +42,7 @@ def test_get_product_list_with_one_product(
     product = create_product(company.id)
     # when
     url = reverse(get_products, company_id=product.company_id)
-    response = client.get(url)
+    response = client.get(url, params={'fields': 'all'})
     # then
     assert response.status_code == 200
     assert response.json()['results'][0]['name'] == product.name
@@ -56,7 +63,7 @@ def test_get_products_list_with_one_company_and_many_products(
     first_product = products[0]
     # when
     url = reverse(get_products, company_id=first_product.company_id)
-    response = client.get(url)
+    response = client.get(url, params={'fields': 'all'})
     # then
     assert response.status_code == 200
     assert len(response.json()['results']) == 10
@@ -68,6 +75,50 @@ def test_get_products_list_with_one_company_and_many_products(
     assert response.json()['results'][0]['company_id'] == first_product.company_id
 
 
+def test_get_products_list_with_cursor_pagination(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(15)
+    company_id = products[0].company_id
+    # when
+    url = reverse(get_products, company_id=company_id)
+    first_page = client.get(url, params={'pagination': 'cursor', 'limit': 7})
+    token = first_page.json()['next_page'].split('after=')[1].split('&')[0]
+    second_page = client.get(url, params={'after': token, 'limit': 7})
+    token = second_page.json()['next_page'].split('after=')[1].split('&')[0]
+    third_page = client.get(url, params={'after': token, 'limit': 7})
+    # then
+    assert first_page.status_code == 200
+    assert first_page.json()['count'] == 15
+    assert first_page.json()['prev_page'] is None
+    assert third_page.json()['next_page'] is None
+    received_ids = [
+        product['id']
+        for page in (first_page, second_page, third_page)
+        for product in page.json()['results']
+    ]
+    assert received_ids == [product.id for product in products]
+
+
+def test_get_products_list_with_estimated_count(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(3)
+    # when
+    url = reverse(get_products, company_id=products[0].company_id)
+    response = client.get(url, params={'count': 'estimate'})
+    # then
+    assert response.status_code == 200
+    assert isinstance(response.json()['count'], int)
+    assert len(response.json()['results']) == 3
+
+
 def test_post_product_list_api_unauth_client(
     api_client,
     create_company,
@@ -254,3 +305,419 @@ def test_delete_specific_product(
     # then
     assert response.status_code == 200
     assert response.json() == 'Product deleted.'
+
+
+def test_bulk_upsert_products_with_json_array(
+    authenticated_api_client,
+    create_product,
+    create_company,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    new_row = product_create_data_dict(company.id)
+    update_row = {**new_row, 'id': product.id, 'name': 'bulkUpdatedName'}
+    missing_row = {**new_row, 'id': product.id + 1000}
+    invalid_row = {**new_row, 'discount': 150}
+    # when
+    url = reverse(bulk_upsert_products, company_id=company.id)
+    response = client.post(url, json=[new_row, update_row, missing_row, invalid_row])
+    # then
+    assert response.status_code == 200
+    assert response.json()['created'] == 1
+    assert response.json()['updated'] == 1
+    assert response.json()['failed'] == 2
+    statuses = [row['status'] for row in response.json()['results']]
+    assert statuses == ['created', 'updated', 'not_found', 'invalid']
+    updated = client.get(reverse(get_product, company_id=company.id, product_id=product.id))
+    assert updated.json()['name'] == 'bulkUpdatedName'
+    created_id = response.json()['results'][0]['id']
+    created = client.get(reverse(get_product, company_id=company.id, product_id=created_id))
+    assert created.json()['name'] == new_row['name']
+
+
+def test_bulk_upsert_products_with_ndjson(
+    authenticated_api_client,
+    create_company,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    rows = [{**product_create_data_dict(company.id), 'name': f'bulk{i}'} for i in range(5)]
+    body = '\n'.join(json.dumps(row) for row in rows) + '\n{not json}\n'
+    # when
+    url = reverse(bulk_upsert_products, company_id=company.id)
+    response = client.post(url, content=body, headers={'Content-Type': 'application/x-ndjson'})
+    # then
+    assert response.status_code == 200
+    assert response.json()['created'] == 5
+    assert response.json()['results'][5]['status'] == 'invalid'
+    listing = client.get(reverse(get_products, company_id=company.id))
+    assert listing.json()['count'] == 5
+
+
+def test_bulk_upsert_products_reports_out_of_range_rows(
+    authenticated_api_client,
+    create_company,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    row = product_create_data_dict(company.id)
+    rows = [row, {**row, 'price': 1e12}, {**row, 'quantity': 2 ** 31}, {**row, 'id': 2 ** 40}]
+    # when
+    url = reverse(bulk_upsert_products, company_id=company.id)
+    response = client.post(url, json=rows)
+    # then
+    assert response.status_code == 200
+    assert response.json()['created'] == 1
+    statuses = [result['status'] for result in response.json()['results']]
+    assert statuses == ['created', 'invalid', 'invalid', 'invalid']
+
+
+def test_bulk_upsert_products_updates_only_rows_of_company(
+    authenticated_api_client,
+    create_product,
+    create_num_of_companies,
+    product_create_data_dict
+):
+    # given
+    client = authenticated_api_client
+    company, other_company = create_num_of_companies(2)
+    product = create_product(company.id)
+    other_product = create_product(other_company.id)
+    row = {**product_create_data_dict(company.id), 'price': None, 'description': None}
+    missing_id = other_product.id + 1000
+    # when
+    url = reverse(bulk_upsert_products, company_id=company.id)
+    response = client.post(url, json=[
+        {**row, 'id': product.id},
+        {**row, 'id': other_product.id, 'name': 'stolen'},
+        {**row, 'id': missing_id}
+    ])
+    # then
+    assert response.status_code == 200
+    statuses = [result['status'] for result in response.json()['results']]
+    assert statuses == ['updated', 'not_found', 'not_found']
+    updated = client.get(reverse(get_product, company_id=company.id, product_id=product.id)).json()
+    assert updated['price'] is None
+    assert updated['version'] == product.version + 1
+    other = client.get(reverse(get_product, company_id=other_company.id, product_id=other_product.id))
+    assert other.json()['name'] == other_product.name
+    missing = client.get(reverse(get_product, company_id=company.id, product_id=missing_id))
+    assert missing.status_code == 404
+
+
+def test_bulk_upsert_products_unauth_client(
+    api_client,
+    create_company,
+    product_create_data_dict
+):
+    # given
+    client = api_client
+    company = create_company
+    # when
+    url = reverse(bulk_upsert_products, company_id=company.id)
+    response = client.post(url, json=[product_create_data_dict(company.id)])
+    # then
+    assert response.status_code == 401
+
+
+def test_export_products_as_ndjson(
+    monkeypatch,
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    monkeypatch.setattr('app.services.api.product.EXPORT_BATCH_SIZE', 2)
+    client = api_client
+    products = create_num_of_products_for_one_company(5)
+    company_id = products[0].company_id
+    # when
+    url = reverse(export_products, company_id=company_id)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['id'] for row in rows] == [product.id for product in products]
+    assert rows[0]['price'] == '123.12'
+    assert rows[0]['company_id'] == company_id
+
+
+def test_export_products_as_csv(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(3)
+    company_id = products[0].company_id
+    # when
+    url = reverse(export_products, company_id=company_id)
+    response = client.get(url, params={'format': 'csv'})
+    # then
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert rows[0]['name'] == 'testProductName'
+
+
+def test_export_products_of_unknown_company(
+    api_client
+):
+    # given
+    client = api_client
+    # when
+    url = reverse(export_products, company_id=404)
+    response = client.get(url)
+    # then
+    assert response.status_code == 404
+
+
+def test_get_specific_product_in_one_query(
+    api_client,
+    create_product,
+    create_company,
+    query_counter
+):
+    # given
+    client = api_client
+    company = create_company
+    product = create_product(company.id)
+    query_counter.clear()
+    # when
+    url = reverse(get_product, company_id=company.id, product_id=product.id)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert len(query_counter) == 1
+
+
+def test_get_products_list_in_one_query(
+    api_client,
+    create_num_of_products_for_one_company,
+    query_counter
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(3)
+    query_counter.clear()
+    # when
+    url = reverse(get_products, company_id=products[0].company_id)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert response.json()['count'] == 3
+    assert len(query_counter) == 1
+
+
+def test_get_specific_product_with_unknown_company_or_product(
+    api_client,
+    create_product,
+    create_company
+):
+    # given
+    client = api_client
+    company = create_company
+    product = create_product(company.id)
+    # when
+    missing_company = client.get(reverse(get_product, company_id=company.id + 1, product_id=product.id))
+    missing_product = client.get(reverse(get_product, company_id=company.id, product_id=product.id + 1))
+    missing_company_products = client.get(reverse(get_products, company_id=company.id + 1))
+    # then
+    assert missing_company.status_code == 404
+    assert missing_company.json()['detail'] == 'Company not found.'
+    assert missing_product.status_code == 404
+    assert missing_product.json()['detail'] == 'Product not found'
+    assert missing_company_products.status_code == 404
+    assert missing_company_products.json()['detail'] == 'Company not found.'
+
+
+def test_put_and_patch_specific_product_in_one_query(
+    authenticated_api_client,
+    create_product,
+    create_company,
+    query_counter
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    url = reverse(put_product, company_id=company.id, product_id=product.id)
+    put_data = {'name': 'updatePutName', 'description': 'updatePutDescription', 'price': '999.99'}
+    client.put(url, json=put_data)
+    query_counter.clear()
+    # when
+    put_response = client.put(url, json=put_data)
+    put_queries = len(query_counter)
+    query_counter.clear()
+    patch_response = client.patch(url, json={'quantity': 7})
+    # then
+    assert put_response.status_code == 200
+    assert put_queries == 1
+    assert patch_response.status_code == 200
+    assert patch_response.json()['quantity'] == 7
+    assert patch_response.json()['name'] == put_data['name']
+    assert len(query_counter) == 1
+
+
+def test_patch_specific_product_with_unknown_company_or_product(
+    authenticated_api_client,
+    create_product,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    product = create_product(company.id)
+    # when
+    missing_company = client.patch(
+        reverse(patch_product, company_id=company.id + 1, product_id=product.id),
+        json={'quantity': 1}
+    )
+    missing_product = client.patch(
+        reverse(patch_product, company_id=company.id, product_id=product.id + 1),
+        json={'quantity': 1}
+    )
+    # then
+    assert missing_company.status_code == 404
+    assert missing_company.json()['detail'] == 'Company not found.'
+    assert missing_product.status_code == 404
+    assert missing_product.json()['detail'] == 'Product not found'
+
+
+def make_catalog(client, company_id: int) -> list[int]:
+    rows = [
+        {'name': 'Green Tea', 'description': 'tea', 'price': '5.00', 'discount': 0, 'quantity': 10},
+        {'name': 'Black tea 100%', 'description': 'tea', 'price': '7.50', 'discount': 15, 'quantity': 0},
+        {'name': 'Coffee', 'description': 'coffee', 'price': '12.00', 'discount': 30, 'quantity': 3},
+        {'name': 'Cocoa', 'description': 'cocoa', 'price': '3.20', 'discount': 5, 'quantity': 1},
+    ]
+    url = reverse(bulk_upsert_products, company_id=company_id)
+    response = client.post(url, json=[{**row, 'company_id': company_id} for row in rows])
+    return [row['id'] for row in response.json()['results']]
+
+
+def test_get_products_list_with_filters(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    green, black, coffee, cocoa = make_catalog(client, company.id)
+    url = reverse(get_products, company_id=company.id)
+    # when
+    by_name = client.get(url, params={'name__icontains': 'TEA'})
+    by_literal_percent = client.get(url, params={'name__icontains': '0%'})
+    by_price = client.get(url, params={'price__gte': '5', 'price__lte': '10'})
+    by_discount_in_stock = client.get(url, params={'discount__gt': 0, 'in_stock': True})
+    out_of_stock = client.get(url, params={'in_stock': False})
+    # then
+    assert [row['id'] for row in by_name.json()['results']] == [green, black]
+    assert by_name.json()['count'] == 2
+    assert [row['id'] for row in by_literal_percent.json()['results']] == [black]
+    assert [row['id'] for row in by_price.json()['results']] == [green, black]
+    assert [row['id'] for row in by_discount_in_stock.json()['results']] == [coffee, cocoa]
+    assert [row['id'] for row in out_of_stock.json()['results']] == [black]
+
+
+def test_get_products_list_sorted_by_price_with_cursor_keeps_filters(
+    authenticated_api_client,
+    create_company
+):
+    # given
+    client = authenticated_api_client
+    company = create_company
+    green, black, coffee, cocoa = make_catalog(client, company.id)
+    url = reverse(get_products, company_id=company.id)
+    params = {'order_by': 'price', 'pagination': 'cursor', 'limit': 1, 'price__lte': '10'}
+    # when
+    pages, response = [], client.get(url, params=params)
+    while True:
+        pages += [row['id'] for row in response.json()['results']]
+        next_link = response.json()['next_page']
+        if next_link is None:
+            break
+        assert 'price__lte=10' in next_link
+        response = client.get('/api' + next_link)
+    # then
+    assert pages == [cocoa, green, black]
+
+
+def test_get_products_list_with_summary_projection(
+    api_client,
+    create_num_of_products_for_one_company,
+    query_counter
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(3)
+    query_counter.clear()
+    # when
+    url = reverse(get_products, company_id=products[0].company_id)
+    response = client.get(url)
+    # then
+    assert response.status_code == 200
+    assert tuple(response.json()['results'][0]) == PRODUCT_SUMMARY_FIELDS
+    assert 'description' not in query_counter[0]
+
+
+def test_get_products_list_with_sparse_fields_sorted_by_price(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(3)
+    # when
+    url = reverse(get_products, company_id=products[0].company_id)
+    response = client.get(url, params={'fields': 'name', 'order_by': 'price', 'pagination': 'cursor', 'limit': 2})
+    # then
+    assert response.status_code == 200
+    assert [set(row) for row in response.json()['results']] == [{'id', 'name'}] * 2
+    # when
+    response = client.get('/api' + response.json()['next_page'])
+    # then
+    assert response.status_code == 200
+    assert [set(row) for row in response.json()['results']] == [{'id', 'name'}]
+
+
+def test_get_specific_product_with_sparse_fields(
+    api_client,
+    create_product,
+    create_company
+):
+    # given
+    client = api_client
+    product = create_product(create_company.id)
+    # when
+    url = reverse(get_product, company_id=product.company_id, product_id=product.id)
+    response = client.get(url, params={'fields': 'price,quantity'})
+    # then
+    assert response.status_code == 200
+    assert response.json() == {'id': product.id, 'price': str(product.price), 'quantity': product.quantity}
+
+
+def test_get_products_list_renders_like_response_model(
+    api_client,
+    create_num_of_products_for_one_company
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(2)
+    # when
+    url = reverse(get_products, company_id=products[0].company_id)
+    response = client.get(url, params={'fields': 'all'})
+    # then
+    assert response.status_code == 200
+    expected = ProductPaginated.model_validate(response.json()).model_dump(mode='json', exclude_unset=True)
+    assert response.json() == expected
+    assert response.json()['results'][0]['price'] == '123.12'
+    assert response.headers['content-type'] == 'application/json'
@@ -0,0 +1,151 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.config.database import ThreadedSession
+from app.routers.company import get_companies, get_company, patch_company
+from app.routers.product import delete_product, get_product, get_products, put_product
+from app.routers.search import search
+from app.services.database.user import UserCRUD
+from app.utils.pathfinder import reverse
+from tests.conftest import TestingSessionLocal, engine
+
+APP_TABLES = {'companies', 'products', 'user', 'refresh_tokens'}
+
+
+@pytest.fixture
+def captured_queries():
+    queries = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            queries.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(statement: str, parameters) -> dict:
+    with engine.begin() as connection:
+        cursor = connection.connection.cursor()
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        return cursor.fetchone()[0][0]['Plan']
+
+
+def seq_scanned_tables(statement: str, parameters) -> set[str]:
+    """Tables read by Seq Scan although sequential scans are made prohibitively expensive.
+
+    Planner falls back to Seq Scan then only when no index fits the predicate.
+    """
+
+    plan = explain(statement, parameters)
+    return {
+        node['Relation Name'] for node in plan_nodes(plan)
+        if node['Node Type'] == 'Seq Scan'
+    } & APP_TABLES
+
+
+def test_crud_queries_use_indexes(
+    authenticated_api_client,
+    create_num_of_products_for_one_company,
+    create_user,
+    captured_queries
+):
+    # given
+    client = authenticated_api_client
+    user = create_user(username='plan.user')
+    products = create_num_of_products_for_one_company(3)
+    company_id, product_id = products[0].company_id, products[0].id
+    db = ThreadedSession(TestingSessionLocal)
+
+    async def refresh_token_queries():
+        crud = UserCRUD(db)
+        await crud.store_refresh_token(
+            token_hash='0' * 64,
+            user_id=user.id,
+            family='plan',
+            expires_at=datetime.now(timezone.utc) + timedelta(days=1)
+        )
+        await crud.consume_refresh_token(token_hash='0' * 64)
+        await db.commit()
+        await crud.delete_refresh_family(family='plan')
+        await crud.delete_expired_refresh_tokens(batch_size=100)
+        await db.close()
+
+    products_url = reverse(get_products, company_id=company_id)
+    put_data = {
+        'name': 'planProductName',
+        'description': 'planProductDescription',
+        'price': '12.50',
+        'discount': 5,
+        'quantity': 3
+    }
+    captured_queries.clear()
+    # when
+    cursor_page = client.get(products_url, params={'limit': 1, 'pagination': 'cursor'})
+    responses = [
+        client.get(reverse(get_companies)),
+        client.get(reverse(get_company, company_id=company_id)),
+        client.patch(reverse(patch_company, company_id=company_id), json={'name': 'planCompanyName'}),
+        client.get(products_url),
+        cursor_page,
+        client.get('/api' + cursor_page.json()['next_page']),
+        client.get(products_url, params={'order_by': 'name', 'count': 'estimate'}),
+        client.get(products_url, params={'order_by': 'price', 'price__gte': 1, 'in_stock': True}),
+        client.get(products_url, params={'name__icontains': 'product', 'discount__gt': 5}),
+        client.get(reverse(get_product, company_id=company_id, product_id=product_id)),
+        client.get(reverse(search), params={'q': 'testProductName', 'limit': 1}),
+        client.put(reverse(put_product, company_id=company_id, product_id=product_id), json=put_data),
+        client.delete(reverse(delete_product, company_id=company_id, product_id=product_id)),
+    ]
+    asyncio.run(refresh_token_queries())
+    # then
+    for response in responses:
+        assert response.status_code == 200, f'{response.request.method} {response.request.url}'
+    assert any(statement.lstrip().startswith('UPDATE products') for statement, _ in captured_queries)
+    assert len(captured_queries) > 10
+    for statement, parameters in captured_queries:
+        assert seq_scanned_tables(statement, parameters) == set(), statement
+
+
+def test_product_cursor_page_starts_index_range(
+    api_client,
+    create_num_of_products_for_one_company,
+    captured_queries
+):
+    # given
+    client = api_client
+    products = create_num_of_products_for_one_company(5)
+    url = reverse(get_products, company_id=products[0].company_id)
+    for order_by in ('price', 'name'):
+        params = {'order_by': order_by, 'pagination': 'cursor', 'limit': 2, 'count': 'none'}
+        next_link = client.get(url, params=params).json()['next_page']
+        captured_queries.clear()
+        # when
+        response = client.get('/api' + next_link)
+        statement, parameters = next(
+            query for query in captured_queries
+            if 'FROM products' in query[0] and 'LIMIT' in query[0]
+        )
+        scans = [
+            node for node in plan_nodes(explain(statement, parameters))
+            if node.get('Index Name') == f'ix_products_company_id_{order_by}_id'
+        ]
+        # then
+        assert response.status_code == 200
+        assert len(scans) == 1
+        # cursor is range start of the index, not a filter over rows before it
+        assert 'ROW(' in scans[0]['Index Cond']
+        assert 'Filter' not in scans[0]
@@ -0,0 +1,74 @@
+from app.models.company import Company
+from app.routers.product import bulk_upsert_products
+from app.routers.search import search
+from app.utils.pathfinder import reverse
+from tests.conftest import TestingSessionLocal
+
+
+def make_search_data(client) -> dict[str, int]:
+    session = TestingSessionLocal()
+    company = Company(name='Tea House', description='Shop of loose leaf tea')
+    other = Company(name='Roastery', description='Coffee beans')
+    session.add_all([company, other])
+    session.commit()
+    ids = {'Tea House': company.id, 'Roastery': other.id}
+    session.close()
+
+    rows = [
+        {'name': 'Green tea', 'description': 'Sencha', 'price': '5.00', 'company_id': ids['Tea House']},
+        {'name': 'Mug', 'description': 'Mug for tea and coffee', 'price': '9.00', 'company_id': ids['Tea House']},
+        {'name': 'Espresso blend', 'description': 'Dark roast coffee', 'price': '15.00', 'company_id': ids['Roastery']},
+    ]
+    response = client.post(reverse(bulk_upsert_products, company_id=ids['Tea House']), json=rows[:2])
+    ids.update({row['name']: hit['id'] for row, hit in zip(rows, response.json()['results'])})
+    response = client.post(reverse(bulk_upsert_products, company_id=ids['Roastery']), json=rows[2:])
+    ids['Espresso blend'] = response.json()['results'][0]['id']
+    return ids
+
+
+def test_search_ranks_name_matches_first(
+    authenticated_api_client
+):
+    # given
+    client = authenticated_api_client
+    ids = make_search_data(client)
+    # when
+    response = client.get(reverse(search), params={'q': 'tea'})
+    # then
+    assert response.status_code == 200
+    hits = [(hit['kind'], hit['id']) for hit in response.json()['results']]
+    assert set(hits[:2]) == {('company', ids['Tea House']), ('product', ids['Green tea'])}
+    assert hits[2] == ('product', ids['Mug'])
+    assert response.json()['results'][2]['company_id'] == ids['Tea House']
+    assert response.json()['next_page'] is None
+
+
+def test_search_with_keyset_pagination(
+    authenticated_api_client
+):
+    # given
+    client = authenticated_api_client
+    make_search_data(client)
+    everything = client.get(reverse(search), params={'q': 'tea or coffee'}).json()['results']
+    # when
+    pages, response = [], client.get(reverse(search), params={'q': 'tea or coffee', 'limit': 2})
+    while True:
+        pages += response.json()['results']
+        if response.json()['next_page'] is None:
+            break
+        response = client.get('/api' + response.json()['next_page'])
+    # then
+    assert len(everything) == 5
+    assert pages == everything
+
+
+def test_search_with_invalid_cursor(
+    api_client
+):
+    # given
+    client = api_client
+    # when
+    response = client.get(reverse(search), params={'q': 'tea', 'after': 'broken'})
+    # then
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor.'
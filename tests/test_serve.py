@@ -0,0 +1,65 @@
+import pytest
+
+from app.serve import parse_args, server_options, worker_pool_limits
+
+
+def test_worker_pool_limits_keep_configured_pool_when_budget_allows():
+    # when
+    limits = worker_pool_limits(workers=2, max_connections=100, reserved=10, pool_size=5, max_overflow=10)
+    # then
+    assert limits == (5, 10)
+
+
+def test_worker_pool_limits_split_budget_between_workers():
+    # when
+    pool_size, max_overflow = worker_pool_limits(
+        workers=8,
+        max_connections=100,
+        reserved=10,
+        pool_size=5,
+        max_overflow=10
+    )
+    # then
+    assert (pool_size, max_overflow) == (5, 6)
+    assert 8 * (pool_size + max_overflow) <= 100 - 10
+
+
+def test_worker_pool_limits_shrink_pool_itself():
+    # when
+    limits = worker_pool_limits(workers=30, max_connections=100, reserved=10, pool_size=5, max_overflow=10)
+    # then
+    assert limits == (3, 0)
+
+
+def test_worker_pool_limits_reject_too_many_workers():
+    # then
+    with pytest.raises(ValueError):
+        worker_pool_limits(workers=100, max_connections=100, reserved=10, pool_size=5, max_overflow=10)
+
+
+def test_parse_args_reject_workers_without_shared_cache(
+    monkeypatch
+):
+    # given
+    monkeypatch.setattr('app.serve.CACHE_BACKEND', 'memory')
+    # then
+    with pytest.raises(SystemExit):
+        parse_args(['--workers', '4'])
+    assert parse_args(['--workers', '1']).workers == 1
+
+
+def test_server_options_from_arguments(
+    monkeypatch
+):
+    # given
+    monkeypatch.setattr('app.serve.CACHE_BACKEND', 'redis')
+    args = parse_args(['--workers', '4', '--keepalive', '75', '--limit-concurrency', '0', '--graceful-timeout', '20'])
+    # when
+    options = server_options(args)
+    # then
+    assert options['workers'] == 4
+    assert options['loop'] == 'uvloop'
+    assert options['http'] == 'httptools'
+    assert options['timeout_keep_alive'] == 75
+    assert options['limit_concurrency'] is None
+    assert options['timeout_graceful_shutdown'] == 20